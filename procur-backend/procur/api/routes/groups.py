@@ -31,7 +31,7 @@ async def create_group(
             success=True,
             message=f"Group '{new_group.name}' created successfully",
             data={
-                "group": new_group.dict(),
+                "group": new_group.model_dump(),
                 "user_role": "admin",
                 "is_creator": True
             },
@@ -56,8 +56,8 @@ async def get_groups(
     industry: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
     privacy: Optional[str] = Query(None),
-    sort_by: str = Query("created_at", regex="^(created_at|member_count|name)$"),
-    sort_order: str = Query("desc", regex="^(asc|desc)$"),
+    sort_by: str = Query("created_at", pattern="^(created_at|member_count|name)$"),
+    sort_order: str = Query("desc", pattern="^(asc|desc)$"),
     current_user: Optional[UserResponse] = Depends(get_optional_user)
 ):
     """Get list of groups with advanced filtering for React components"""
@@ -100,7 +100,7 @@ async def get_groups(
                 group_data['user_role'] = member_doc.to_dict().get('role') if member_doc.exists else None
                 
                 # Check if there's a pending join request
-                pending_request = db.collection('join_requests').where('group_id', '==', doc.id).where('user_id', '==', current_user.uid).where('status', '==', 'pending').get()
+                pending_request = db.collection('join_requests').where('group_id', '==', doc.id).where('user_id', '==', current_user.uid).where('status', '==', 'pending').limit(1).get()
                 group_data['has_pending_request'] = len(pending_request) > 0
             else:
                 group_data['is_member'] = False
@@ -182,7 +182,7 @@ async def get_group_detail(
                 can_join = False
             else:
                 # Check for pending join request
-                pending_requests = db.collection('join_requests').where('group_id', '==', group_id).where('user_id', '==', current_user.uid).where('status', '==', 'pending').get()
+                pending_requests = db.collection('join_requests').where('group_id', '==', group_id).where('user_id', '==', current_user.uid).where('status', '==', 'pending').limit(1).get()
                 has_pending_request = len(pending_requests) > 0
                 can_join = not has_pending_request
         
@@ -276,7 +276,7 @@ async def update_group(
         return ReactAPIResponse(
             success=True,
             message=f"Group '{updated_group.name}' updated successfully",
-            data={"group": updated_group.dict()}
+            data={"group": updated_group.model_dump()}
         )
         
     except Exception as e:
@@ -327,7 +327,7 @@ async def request_join_group(
             raise HTTPException(status_code=400, detail="Already a member of this group")
         
         # Check if there's already a pending request
-        existing_requests = db.collection('join_requests').where('group_id', '==', group_id).where('user_id', '==', current_user.uid).where('status', '==', 'pending').get()
+        existing_requests = db.collection('join_requests').where('group_id', '==', group_id).where('user_id', '==', current_user.uid).where('status', '==', 'pending').limit(1).get()
         if len(existing_requests) > 0:
             raise HTTPException(status_code=400, detail="Join request already pending")
         
@@ -457,10 +457,14 @@ async def handle_join_request(
             'updated_at': datetime.utcnow()
         }
         
-        db.collection('join_requests').document(request_id).update(update_data)
+        # Status change, membership and member count are committed atomically in one batch
+        batch = db.batch()
+        batch.update(db.collection('join_requests').document(request_id), update_data)
         
         # If approved, add user to group
         if request_update.status == 'approved':
+            group_ref = db.collection('groups').document(group_id)
+            
             # Add user to group members
             member_data = {
                 'user_id': request_data['user_id'],
@@ -468,14 +472,16 @@ async def handle_join_request(
                 'joined_at': datetime.utcnow(),
                 'updated_at': datetime.utcnow()
             }
-            
-            db.collection('groups').document(group_id).collection('members').document(request_data['user_id']).set(member_data)
+            batch.set(group_ref.collection('members').document(request_data['user_id']), member_data)
             
             # Increment member count
-            db.collection('groups').document(group_id).update({
+            batch.update(group_ref, {
                 'member_count': Increment(1)
             })
-            
+        
+        batch.commit()
+        
+        if request_update.status == 'approved':
             # Send approval email
             background_tasks.add_task(send_approval_email, request_data['user_id'], group_id)
         
@@ -595,13 +601,14 @@ async def remove_member(
         if not member_doc.exists:
             raise HTTPException(status_code=404, detail="User is not a member of this group")
         
-        # Remove member
-        db.collection('groups').document(group_id).collection('members').document(user_id).delete()
-        
-        # Decrement member count
-        db.collection('groups').document(group_id).update({
+        # Remove member and decrement member count in one atomic batch
+        group_ref = db.collection('groups').document(group_id)
+        batch = db.batch()
+        batch.delete(group_ref.collection('members').document(user_id))
+        batch.update(group_ref, {
             'member_count': Increment(-1)
         })
+        batch.commit()
         
         return ReactAPIResponse(
             success=True,
@@ -634,13 +641,14 @@ async def leave_group(
             if len(admin_members) <= 1:
                 raise HTTPException(status_code=400, detail="Cannot leave group as the only admin. Transfer admin role first or delete the group.")
         
-        # Remove user from group
-        db.collection('groups').document(group_id).collection('members').document(current_user.uid).delete()
-        
-        # Decrement member count
-        db.collection('groups').document(group_id).update({
+        # Remove user from group and decrement member count in one atomic batch
+        group_ref = db.collection('groups').document(group_id)
+        batch = db.batch()
+        batch.delete(group_ref.collection('members').document(current_user.uid))
+        batch.update(group_ref, {
             'member_count': Increment(-1)
         })
+        batch.commit()
         
         return ReactAPIResponse(
             success=True,
@@ -80,7 +80,7 @@ async def create_invitation(
             success=True,
             message="Invitation created successfully",
             data={
-                "invitation": invitation_response.dict(),
+                "invitation": invitation_response.model_dump(),
                 "invitation_url": invitation_url,
                 "emails_sent": emails_sent
             },
@@ -196,7 +196,7 @@ async def join_via_invitation(
             raise HTTPException(status_code=400, detail="Already a member of this group")
         
         # Check if there's a pending join request
-        existing_requests = db.collection('join_requests').where('group_id', '==', group_id).where('user_id', '==', current_user.uid).where('status', '==', 'pending').get()
+        existing_requests = db.collection('join_requests').where('group_id', '==', group_id).where('user_id', '==', current_user.uid).where('status', '==', 'pending').limit(1).get()
         if len(existing_requests) > 0:
             raise HTTPException(status_code=400, detail="Join request already pending")
         
@@ -208,17 +208,21 @@ async def join_via_invitation(
             'updated_at': datetime.utcnow()
         }
         
-        db.collection('groups').document(group_id).collection('members').document(current_user.uid).set(member_data)
+        # Membership, member count and invitation usage are committed atomically in one batch
+        group_ref = db.collection('groups').document(group_id)
+        batch = db.batch()
+        batch.set(group_ref.collection('members').document(current_user.uid), member_data)
         
         # Increment member count
-        db.collection('groups').document(group_id).update({
+        batch.update(group_ref, {
             'member_count': Increment(1)
         })
         
         # Increment invitation usage
-        db.collection('invitations').document(invitation_doc.id).update({
+        batch.update(db.collection('invitations').document(invitation_doc.id), {
             'current_uses': Increment(1)
         })
+        batch.commit()
         
         # Get group details for response
         group_doc = db.collection('groups').document(group_id).get()
@@ -33,7 +33,7 @@ async def register_user(
             )
         
         # Create user document
-        user_dict = user_data.dict()
+        user_dict = user_data.model_dump()
         user_dict.update({
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow(),
@@ -53,7 +53,7 @@ async def register_user(
             success=True,
             message="User registered successfully",
             data={
-                "user": new_user.dict(),
+                "user": new_user.model_dump(),
                 "first_time": True
             },
             meta={
@@ -132,7 +132,7 @@ async def update_user_profile(
         db = get_firestore_client()
         
         # Prepare update data
-        update_data = {k: v for k, v in user_update.dict().items() if v is not None}
+        update_data = {k: v for k, v in user_update.model_dump().items() if v is not None}
         if update_data:
             update_data['updated_at'] = datetime.utcnow()
             
@@ -165,7 +165,7 @@ async def update_user_profile(
             return ReactAPIResponse(
                 success=False,
                 message="No fields to update",
-                data={"user": current_user.dict()}
+                data={"user": current_user.model_dump()}
             )
         
     except Exception as e:
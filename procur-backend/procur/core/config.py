@@ -1,4 +1,4 @@
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List, Optional
 from functools import lru_cache
 import os
@@ -56,9 +56,7 @@ class Settings(BaseSettings):
     ENABLE_FILE_UPLOADS: bool = True
     ENABLE_REAL_TIME_NOTIFICATIONS: bool = True
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
 @lru_cache()
 def get_settings():
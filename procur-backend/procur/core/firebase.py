@@ -5,6 +5,7 @@ import logging
 import os
 from datetime import datetime, timedelta
 from typing import Dict, Optional
+from functools import lru_cache
 import time
 
 logger = logging.getLogger(__name__)
@@ -48,8 +49,9 @@ def initialize_firebase():
         logger.error(f"Failed to initialize Firebase: {e}")
         raise
 
+@lru_cache(maxsize=1)
 def get_firestore_client():
-    """Get Firestore client"""
+    """Get Firestore client (created once; failures are not cached)"""
     print("🔥 DEBUG: Getting Firestore client...")
     if not firebase_admin._apps:
         print("🔥 DEBUG: No Firebase apps found!")
@@ -1,7 +1,24 @@
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, List, Dict, Any
+from pydantic import AfterValidator, BaseModel, ConfigDict, EmailStr, Field, WithJsonSchema
+from typing import Annotated, Optional, List, Dict, Any
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
+import re
+
+# Compiled once and shared by every model with a phone number field
+# fullmatch rather than match with `$`, which would also accept a trailing newline
+PHONE_RE = re.compile(r'\+?1?\d{9,15}')
+
+def _validate_phone(value: str) -> str:
+    if not PHONE_RE.fullmatch(value):
+        raise ValueError("Invalid phone number format")
+    return value
+
+PhoneNumber = Annotated[
+    str,
+    AfterValidator(_validate_phone),
+    WithJsonSchema({"type": "string", "pattern": f"^{PHONE_RE.pattern}$"}),
+]
 
 class UserRole(str, Enum):
     ADMIN = "admin"
@@ -24,7 +41,7 @@ class UserBase(BaseModel):
     display_name: str = Field(..., min_length=1, max_length=100)
     company_name: Optional[str] = Field(None, max_length=200)
     industry: Optional[str] = Field(None, max_length=100)
-    phone: Optional[str] = Field(None, pattern=r'^\+?1?\d{9,15}$')
+    phone: Optional[PhoneNumber] = None
     avatar_url: Optional[str] = None
     bio: Optional[str] = Field(None, max_length=500)
 
@@ -35,9 +52,11 @@ class UserUpdate(BaseModel):
     display_name: Optional[str] = Field(None, min_length=1, max_length=100)
     company_name: Optional[str] = Field(None, max_length=200)
     industry: Optional[str] = Field(None, max_length=100)
-    phone: Optional[str] = Field(None, pattern=r'^\+?1?\d{9,15}$')
+    phone: Optional[PhoneNumber] = None
 
 class UserResponse(UserBase):
+    model_config = ConfigDict(frozen=True)
+    
     uid: str
     created_at: datetime
     updated_at: datetime
@@ -55,7 +74,7 @@ class RegisterRequest(BaseModel):
     job_title: Optional[str] = Field(None, max_length=100)
     industry: Optional[str] = Field(None, max_length=100)
     location: Optional[str] = Field(None, max_length=100)
-    phone_number: Optional[str] = Field(None, pattern=r'^\+?1?\d{9,15}$')
+    phone_number: Optional[PhoneNumber] = None
 
 class AuthResponse(BaseModel):
     user: UserResponse
@@ -78,7 +97,7 @@ class GroupBase(BaseModel):
     commission_rate: Optional[float] = Field(None, ge=0, le=1)
     logo_url: Optional[str] = None
     banner_url: Optional[str] = None
-    tags: Optional[List[str]] = Field(None, max_items=10)
+    tags: Optional[List[str]] = Field(None, max_length=10)
 
 class GroupCreate(GroupBase):
     pass
@@ -92,6 +111,8 @@ class GroupUpdate(BaseModel):
     commission_rate: Optional[float] = Field(None, ge=0, le=1)
 
 class GroupResponse(GroupBase):
+    model_config = ConfigDict(frozen=True)
+    
     id: str
     admin_id: str
     member_count: int
@@ -99,7 +120,25 @@ class GroupResponse(GroupBase):
     updated_at: datetime
     is_active: bool
 
-class GroupMemberResponse(BaseModel):
+    @classmethod
+    def from_firestore(cls, data: Dict[str, Any]) -> "GroupResponse":
+        """Build from a trusted Firestore document without re-running validators"""
+        data = dict(data)
+        for key in ('created_at', 'updated_at'):
+            value = data.get(key)
+            # Firestore returns DatetimeWithNanoseconds; unwrap to a plain datetime
+            if isinstance(value, datetime) and type(value) is not datetime:
+                data[key] = datetime(
+                    value.year, value.month, value.day, value.hour,
+                    value.minute, value.second, value.microsecond, tzinfo=value.tzinfo
+                )
+        if 'privacy' in data:
+            data['privacy'] = GroupPrivacy(data['privacy'])
+        return cls.model_construct(**data)
+
+# Built from trusted Firestore data, so skip pydantic validation
+@dataclass(slots=True, frozen=True)
+class GroupMemberResponse:
     user_id: str
     email: str
     display_name: str
@@ -113,13 +152,15 @@ class JoinRequestCreate(BaseModel):
     message: Optional[str] = Field(None, max_length=500)
 
 class JoinRequestResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     id: str
     group_id: str
     group_name: str
     user_id: str
     user_email: str
     user_name: str
-    user_company: Optional[str]
+    user_company: Optional[str] = None
     message: Optional[str]
     status: JoinRequestStatus
     created_at: datetime
@@ -135,9 +176,11 @@ class InvitationCreate(BaseModel):
     group_id: str = Field(..., min_length=1)
     expires_in_days: int = Field(7, ge=1, le=365)
     max_uses: Optional[int] = Field(None, ge=1, le=1000)
-    email_list: Optional[List[EmailStr]] = Field(None, max_items=100)
+    email_list: Optional[List[EmailStr]] = Field(None, max_length=100)
 
 class InvitationResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     id: str
     group_id: str
     group_name: str
@@ -158,8 +201,9 @@ class InvitationValidateResponse(BaseModel):
     expires_at: datetime
     uses_remaining: Optional[int]
 
-# Email templates
-class EmailTemplate(BaseModel):
+# Email templates (rendered internally, never parsed from a request; frozen so renders can be cached)
+@dataclass(slots=True, frozen=True)
+class EmailTemplate:
     subject: str
     html_body: str
     text_body: str
@@ -193,28 +237,32 @@ class FileUploadResponse(BaseModel):
     file_info: FileUpload
     cdn_url: Optional[str] = None
 
-# Real-time notification models
-class NotificationBase(BaseModel):
+# Real-time notification models (internal DTOs, built from Firestore)
+@dataclass(slots=True, frozen=True)
+class NotificationBase:
     id: str
     user_id: str
     type: str  # 'join_request', 'join_approved', 'group_invitation', etc.
     title: str
     message: str
+    created_at: datetime
     data: Optional[Dict[str, Any]] = None
     read: bool = False
-    created_at: datetime
 
+@dataclass(slots=True, frozen=True)
 class NotificationResponse(NotificationBase):
     pass
 
 # WebSocket message models
-class WebSocketMessage(BaseModel):
+@dataclass(slots=True)
+class WebSocketMessage:
     type: str  # 'notification', 'group_update', 'member_joined', etc.
     data: Dict[str, Any]
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = field(default_factory=datetime.utcnow)
 
-# React component data models
-class DashboardData(BaseModel):
+# React component data models (assembled server-side from already-validated models)
+@dataclass(slots=True)
+class DashboardData:
     """Data model for React dashboard component"""
     user: UserResponse
     groups: List[GroupResponse]
@@ -222,7 +270,8 @@ class DashboardData(BaseModel):
     pending_requests: int
     stats: Dict[str, Any]
 
-class GroupDetailData(BaseModel):
+@dataclass(slots=True)
+class GroupDetailData:
     """Data model for React group detail component"""
     group: GroupResponse
     members: List[GroupMemberResponse]
@@ -230,7 +279,8 @@ class GroupDetailData(BaseModel):
     pending_requests: List[JoinRequestResponse]
     recent_activity: List[Dict[str, Any]]
 
-class PaginatedResponse(BaseModel):
+@dataclass(slots=True, frozen=True)
+class PaginatedResponse:
     items: List[Any]
     total: int
     page: int
@@ -4,27 +4,52 @@ from email.mime.multipart import MIMEMultipart
 from procur.core.config import get_settings
 from procur.models.schemas import EmailTemplate
 import logging
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
+import threading
 import time
 
 logger = logging.getLogger(__name__)
 
+# SMTP replies that mean "slow down, try again" rather than a hard failure
+SMTP_THROTTLE_CODES = (421, 450, 451)
+SMTP_MAX_RETRIES = 5
+
+def _is_smtp_throttle(error: smtplib.SMTPException) -> bool:
+    """Whether an SMTP error is a temporary "slow down" reply worth retrying"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        # Raised at RCPT with a per-recipient (code, message); retry only if all were throttled
+        return bool(error.recipients) and all(
+            code in SMTP_THROTTLE_CODES for code, _ in error.recipients.values()
+        )
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code in SMTP_THROTTLE_CODES
+
 class EmailService:
     def __init__(self):
         self.settings = get_settings()
         self.executor = ThreadPoolExecutor(max_workers=5)
-        self._email_queue = []
+        # Min-heap of (-priority, sequence, item); sequence keeps FIFO order within a priority
+        self._email_queue: List[Tuple[int, int, Dict[str, Any]]] = []
+        self._queue_counter = itertools.count()
+        # Updated from executor threads, so every read-modify-write goes through the lock
+        self._stats_lock = threading.Lock()
         self._stats = {
             "sent": 0,
             "failed": 0,
             "queued": 0
         }
     
+    def _record_stat(self, key: str, delta: int = 1):
+        """Atomically adjust one of the email statistics counters"""
+        with self._stats_lock:
+            self._stats[key] += delta
+    
     def _send_email_sync(self, to_email: str, template: EmailTemplate) -> Dict[str, Any]:
         """Send email synchronously with detailed result"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         result = {
             "email": to_email,
             "success": False,
@@ -46,42 +71,50 @@ class EmailService:
             msg.attach(text_part)
             msg.attach(html_part)
             
-            # Send email
-            with smtplib.SMTP(self.settings.SMTP_SERVER, self.settings.SMTP_PORT) as server:
-                server.starttls()
-                server.login(self.settings.SMTP_USERNAME, self.settings.SMTP_PASSWORD)
-                server.send_message(msg)
+            # Send email; each attempt opens a fresh connection, since smtplib
+            # closes the session itself when the server replies 421
+            delay = 0.1
+            for attempt in range(SMTP_MAX_RETRIES + 1):
+                try:
+                    with smtplib.SMTP(self.settings.SMTP_SERVER, self.settings.SMTP_PORT) as server:
+                        server.starttls()
+                        server.login(self.settings.SMTP_USERNAME, self.settings.SMTP_PASSWORD)
+                        server.send_message(msg)
+                    break
+                except smtplib.SMTPException as e:
+                    if attempt == SMTP_MAX_RETRIES or not _is_smtp_throttle(e):
+                        raise
+                    logger.warning(f"SMTP server throttled send to {to_email} ({e}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    delay = min(delay * 2, 30)
             
-            result.update({
-                "success": True,
-                "sent_at": time.time(),
-                "duration": time.time() - start_time
-            })
+            result["success"] = True
+            result["sent_at"] = time.time()
             
-            self._stats["sent"] += 1
-            logger.info(f"Email sent successfully to {to_email} in {result['duration']:.2f}s")
+            self._record_stat("sent")
+            logger.info(f"Email sent successfully to {to_email} in {time.perf_counter() - start_time:.2f}s")
             
         except smtplib.SMTPAuthenticationError as e:
             result["error"] = f"SMTP Authentication failed: {str(e)}"
             logger.error(f"SMTP auth error sending to {to_email}: {e}")
-            self._stats["failed"] += 1
+            self._record_stat("failed")
             
         except smtplib.SMTPRecipientsRefused as e:
             result["error"] = f"Recipient refused: {str(e)}"
             logger.error(f"Recipient refused {to_email}: {e}")
-            self._stats["failed"] += 1
+            self._record_stat("failed")
             
         except smtplib.SMTPException as e:
             result["error"] = f"SMTP error: {str(e)}"
             logger.error(f"SMTP error sending to {to_email}: {e}")
-            self._stats["failed"] += 1
+            self._record_stat("failed")
             
         except Exception as e:
             result["error"] = f"Unexpected error: {str(e)}"
             logger.error(f"Unexpected error sending email to {to_email}: {e}")
-            self._stats["failed"] += 1
+            self._record_stat("failed")
         
-        result["duration"] = time.time() - start_time
+        result["duration"] = time.perf_counter() - start_time
         return result
     
     async def send_email(self, to_email: str, template: EmailTemplate) -> Dict[str, Any]:
@@ -105,56 +138,67 @@ class EmailService:
         
         return result
     
-    async def send_bulk_emails(self, email_list: List[str], template: EmailTemplate) -> List[Dict[str, Any]]:
-        """Send emails to multiple recipients with batch processing"""
+    async def _send_email_reporting_errors(self, to_email: str, template: EmailTemplate) -> Dict[str, Any]:
+        """send_email, turning an unexpected exception into a failed result for this recipient"""
+        try:
+            return await self.send_email(to_email, template)
+        except Exception as e:
+            return {
+                "email": to_email,
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def send_bulk_emails(self, email_list: List[str], template: EmailTemplate) -> AsyncIterator[Dict[str, Any]]:
+        """Send emails to multiple recipients, yielding each result as soon as it completes"""
+        # Drop duplicate recipients while keeping the first spelling and the original order.
+        # Only the domain is case-folded: RFC 5321 leaves the local part case-sensitive.
+        seen = set()
+        unique_emails = []
+        for email in email_list:
+            local, at, domain = email.rpartition("@")
+            key = f"{local}{at}{domain.lower()}" if at else email
+            if key not in seen:
+                seen.add(key)
+                unique_emails.append(email)
+        email_list = unique_emails
+        
         if not self.settings.ENABLE_EMAIL_NOTIFICATIONS:
             logger.info(f"Email notifications disabled, skipping {len(email_list)} emails")
-            return [
-                {
+            for email in email_list:
+                yield {
                     "email": email,
                     "success": True,
                     "skipped": True,
                     "reason": "notifications_disabled"
                 }
-                for email in email_list
-            ]
+            return
         
         # Process emails in batches of 10 to avoid overwhelming SMTP server
         batch_size = 10
-        all_results = []
+        successful = 0
+        failed = 0
         
         for i in range(0, len(email_list), batch_size):
             batch = email_list[i:i + batch_size]
             logger.info(f"Processing email batch {i//batch_size + 1}/{(len(email_list) + batch_size - 1)//batch_size}")
             
-            # Send batch asynchronously
-            tasks = [self.send_email(email, template) for email in batch]
-            batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Handle exceptions in results
-            processed_results = []
-            for result in batch_results:
-                if isinstance(result, Exception):
-                    processed_results.append({
-                        "email": "unknown",
-                        "success": False,
-                        "error": str(result)
-                    })
+            # Send batch asynchronously and hand back results in completion order
+            tasks = [self._send_email_reporting_errors(email, template) for email in batch]
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                if result.get("success"):
+                    successful += 1
                 else:
-                    processed_results.append(result)
-            
-            all_results.extend(processed_results)
-            
-            # Small delay between batches to be respectful to SMTP server
-            if i + batch_size < len(email_list):
-                await asyncio.sleep(1)
+                    failed += 1
+                yield result
         
         # Log summary
-        successful = len([r for r in all_results if r.get("success")])
-        failed = len([r for r in all_results if not r.get("success")])
         logger.info(f"Bulk email completed: {successful} sent, {failed} failed")
-        
-        return all_results
+    
+    async def send_bulk_emails_list(self, email_list: List[str], template: EmailTemplate) -> List[Dict[str, Any]]:
+        """Collect send_bulk_emails results into a list for callers that need them all at once"""
+        return [result async for result in self.send_bulk_emails(email_list, template)]
     
     async def send_templated_email(
         self, 
@@ -180,15 +224,17 @@ class EmailService:
     
     def get_stats(self) -> Dict[str, int]:
         """Get email service statistics for React dashboard"""
-        return self._stats.copy()
+        with self._stats_lock:
+            return self._stats.copy()
     
     def reset_stats(self):
         """Reset email statistics"""
-        self._stats = {
-            "sent": 0,
-            "failed": 0,
-            "queued": 0
-        }
+        with self._stats_lock:
+            self._stats = {
+                "sent": 0,
+                "failed": 0,
+                "queued": 0
+            }
     
     async def test_connection(self) -> Dict[str, Any]:
         """Test SMTP connection for React settings page"""
@@ -222,11 +268,9 @@ class EmailService:
             "queued_at": time.time()
         }
         
-        self._email_queue.append(email_item)
-        self._stats["queued"] += 1
-        
-        # Sort queue by priority (higher priority first)
-        self._email_queue.sort(key=lambda x: x["priority"], reverse=True)
+        # Higher priority first; the counter breaks ties so items are never compared
+        heapq.heappush(self._email_queue, (-priority, next(self._queue_counter), email_item))
+        self._record_stat("queued")
         
         logger.info(f"Email queued for {to_email}, queue size: {len(self._email_queue)}")
     
@@ -239,9 +283,11 @@ class EmailService:
                 "results": []
             }
         
-        # Get batch from queue
-        batch = self._email_queue[:batch_size]
-        self._email_queue = self._email_queue[batch_size:]
+        # Pop the highest-priority batch from the heap
+        batch = [
+            heapq.heappop(self._email_queue)[2]
+            for _ in range(min(batch_size, len(self._email_queue)))
+        ]
         
         # Send batch
         results = []
@@ -250,7 +296,7 @@ class EmailService:
             result["priority"] = item["priority"]
             result["queue_time"] = time.time() - item["queued_at"]
             results.append(result)
-            self._stats["queued"] -= 1
+            self._record_stat("queued", -1)
         
         return {
             "processed": len(batch),
@@ -1,19 +1,24 @@
+from __future__ import annotations
+
 from procur.core.firebase import get_firestore_client
-from procur.models.schemas import (
-    GroupCreate, GroupUpdate, GroupResponse, GroupMemberResponse,
-    JoinRequestCreate, JoinRequestResponse, JoinRequestUpdate, JoinRequestStatus,
-    UserRole, GroupPrivacy
-)
+from procur.models.schemas import GroupResponse, JoinRequestResponse, JoinRequestStatus, UserRole
 from procur.services.email_service import email_service
 from procur.templates.email_templates import get_join_request_template, get_join_approved_template
 from fastapi import HTTPException
-from typing import List, Optional
+from typing import TYPE_CHECKING, Optional, Set
 from datetime import datetime
+import asyncio
 import uuid
 import logging
 
+if TYPE_CHECKING:
+    from procur.models.schemas import GroupCreate, JoinRequestCreate
+
 logger = logging.getLogger(__name__)
 
+# Strong references to fire-and-forget tasks so they are not garbage collected mid-flight
+_background_tasks: Set[asyncio.Task] = set()
+
 class GroupService:
     def __init__(self):
         self._db = None
@@ -29,15 +34,16 @@ class GroupService:
         """Create a new group"""
         try:
             group_id = str(uuid.uuid4())
+            now = datetime.utcnow()
             
             # Prepare group document
             group_doc = {
-                **group_data.dict(),
+                **group_data.model_dump(),
                 'id': group_id,
                 'admin_id': admin_uid,
                 'member_count': 1,
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow(),
+                'created_at': now,
+                'updated_at': now,
                 'is_active': True
             }
             
@@ -48,11 +54,12 @@ class GroupService:
             member_data = {
                 'user_id': admin_uid,
                 'role': UserRole.ADMIN,
-                'joined_at': datetime.utcnow()
+                'joined_at': now
             }
             self.db.collection('groups').document(group_id).collection('members').document(admin_uid).set(member_data)
             
-            return GroupResponse(**group_doc)
+            # group_doc was just built from a validated GroupCreate, so skip re-validation
+            return GroupResponse.model_construct(**group_doc)
             
         except Exception as e:
             logger.error(f"Failed to create group: {e}")
@@ -65,8 +72,7 @@ class GroupService:
             if not group_doc.exists:
                 return None
             
-            group_data = group_doc.to_dict()
-            return GroupResponse(**group_data)
+            return GroupResponse.from_firestore(group_doc.to_dict())
             
         except Exception as e:
             logger.error(f"Failed to get group {group_id}: {e}")
@@ -75,18 +81,36 @@ class GroupService:
     async def request_to_join(self, request_data: JoinRequestCreate, user_uid: str, user_email: str, user_name: str) -> JoinRequestResponse:
         """Create a join request"""
         try:
+            group_ref = self.db.collection('groups').document(request_data.group_id)
+            member_ref = group_ref.collection('members').document(user_uid)
+            pending_query = (
+                self.db.collection('join_requests')
+                .where('group_id', '==', request_data.group_id)
+                .where('user_id', '==', user_uid)
+                .where('status', '==', JoinRequestStatus.PENDING)
+                .limit(1)
+            )
+            
+            # Fetch group + membership in one batched read, concurrently with the pending-request probe
+            snapshots, existing_request = await asyncio.gather(
+                asyncio.to_thread(lambda: list(self.db.get_all([group_ref, member_ref]))),
+                asyncio.to_thread(pending_query.get)
+            )
+            # get_all does not guarantee ordering, so match snapshots by path
+            snapshots = {snap.reference.path: snap for snap in snapshots}
+            group_doc = snapshots.get(group_ref.path)
+            member_doc = snapshots.get(member_ref.path)
+            
             # Check if group exists
-            group = await self.get_group(request_data.group_id)
-            if not group:
+            if group_doc is None or not group_doc.exists:
                 raise HTTPException(status_code=404, detail="Group not found")
+            group = GroupResponse.from_firestore(group_doc.to_dict())
             
             # Check if user is already a member
-            member_doc = self.db.collection('groups').document(request_data.group_id).collection('members').document(user_uid).get()
-            if member_doc.exists:
+            if member_doc is not None and member_doc.exists:
                 raise HTTPException(status_code=400, detail="Already a member of this group")
             
             # Check if there's already a pending request
-            existing_request = self.db.collection('join_requests').where('group_id', '==', request_data.group_id).where('user_id', '==', user_uid).where('status', '==', JoinRequestStatus.PENDING).get()
             if existing_request:
                 raise HTTPException(status_code=400, detail="Join request already pending")
             
@@ -106,8 +130,10 @@ class GroupService:
             
             self.db.collection('join_requests').document(request_id).set(join_request)
             
-            # Send email to group admin
-            await self._notify_admin_of_join_request(group, join_request)
+            # Send email to group admin without holding up the response
+            task = asyncio.create_task(self._notify_admin_of_join_request(group, join_request))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
             
             return JoinRequestResponse(**join_request)
             
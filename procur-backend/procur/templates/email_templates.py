@@ -1,55 +1,56 @@
 from procur.models.schemas import EmailTemplate
 from typing import Dict, Any
+from functools import lru_cache
+from jinja2 import DictLoader, Environment
 
-def get_base_html_template() -> str:
-    """Base HTML template with consistent styling for all emails"""
-    return """
+# Base HTML layout with consistent styling for all emails; the others extend its content block
+_BASE_HTML_TEMPLATE = """
     <html>
     <head>
         <meta charset="utf-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <style>
-            body {{ 
+            body { 
                 font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', 'Helvetica Neue', Arial, sans-serif;
                 line-height: 1.6; 
                 color: #374151; 
                 margin: 0; 
                 padding: 0; 
                 background-color: #f9fafb;
-            }}
-            .email-container {{ 
+            }
+            .email-container { 
                 max-width: 600px; 
                 margin: 20px auto; 
                 background: #ffffff;
                 border-radius: 12px;
                 box-shadow: 0 4px 20px rgba(0, 0, 0, 0.08);
                 overflow: hidden;
-            }}
-            .header {{ 
+            }
+            .header { 
                 background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                 color: white; 
                 padding: 40px 30px; 
                 text-align: center; 
-            }}
-            .header h1 {{
+            }
+            .header h1 {
                 margin: 0;
                 font-size: 28px;
                 font-weight: 700;
-            }}
-            .header p {{
+            }
+            .header p {
                 margin: 10px 0 0 0;
                 opacity: 0.9;
                 font-size: 16px;
-            }}
-            .content {{ 
+            }
+            .content { 
                 padding: 40px 30px; 
-            }}
-            .content p {{
+            }
+            .content p {
                 margin: 0 0 16px 0;
                 font-size: 16px;
                 line-height: 1.6;
-            }}
-            .button {{ 
+            }
+            .button { 
                 background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                 color: white; 
                 padding: 16px 32px; 
@@ -60,80 +61,76 @@ def get_base_html_template() -> str:
                 font-size: 16px;
                 box-shadow: 0 4px 12px rgba(102, 126, 234, 0.3);
                 transition: transform 0.2s ease;
-            }}
-            .button:hover {{
+            }
+            .button:hover {
                 transform: translateY(-1px);
-            }}
-            .info-box {{ 
+            }
+            .info-box { 
                 background: #f8fafc; 
                 border: 1px solid #e2e8f0;
                 padding: 24px; 
                 margin: 24px 0; 
                 border-radius: 8px; 
                 border-left: 4px solid #667eea;
-            }}
-            .info-box h3 {{
+            }
+            .info-box h3 {
                 color: #475569; 
                 margin: 0 0 12px 0;
                 font-size: 18px;
-            }}
-            .info-box ul {{
+            }
+            .info-box ul {
                 color: #64748b; 
                 padding-left: 20px;
                 margin: 0;
-            }}
-            .info-box ul li {{
+            }
+            .info-box ul li {
                 margin-bottom: 8px;
-            }}
-            .footer {{ 
+            }
+            .footer { 
                 background: #f8fafc;
                 padding: 30px; 
                 text-align: center; 
                 color: #64748b; 
                 font-size: 14px;
                 border-top: 1px solid #e2e8f0;
-            }}
-            .footer p {{
+            }
+            .footer p {
                 margin: 5px 0;
                 font-size: 14px;
-            }}
-            .highlight {{
+            }
+            .highlight {
                 color: #667eea;
                 font-weight: 600;
-            }}
-            .center {{
+            }
+            .center {
                 text-align: center;
                 margin: 30px 0;
-            }}
+            }
         </style>
     </head>
     <body>
         <div class="email-container">
-            {content}
+            {% block content %}{% endblock %}
         </div>
     </body>
     </html>
     """
 
-def get_join_request_template(group_name: str, requester_name: str, requester_email: str, message: str, request_id: str) -> EmailTemplate:
-    """Email template for join request notifications"""
-    
-    subject = f"New join request for {group_name}"
-    
-    content = f"""
+# Per-email content blocks, rendered into base.html by Jinja2 (autoescaped)
+_JOIN_REQUEST_HTML = """{% extends "base.html" %}{% block content %}
         <div class="header">
             <h1>🔔 New Join Request</h1>
-            <p>Someone wants to join {group_name}</p>
+            <p>Someone wants to join {{ group_name }}</p>
         </div>
         <div class="content">
             <p><strong>Hi there!</strong></p>
-            <p>You have a new join request for your group <span class="highlight">{group_name}</span>.</p>
+            <p>You have a new join request for your group <span class="highlight">{{ group_name }}</span>.</p>
             
             <div class="info-box">
                 <h3>Request Details</h3>
-                <p><strong>Requester:</strong> {requester_name}</p>
-                <p><strong>Email:</strong> {requester_email}</p>
-                <p><strong>Message:</strong> {message or 'No message provided'}</p>
+                <p><strong>Requester:</strong> {{ requester_name }}</p>
+                <p><strong>Email:</strong> {{ requester_email }}</p>
+                <p><strong>Message:</strong> {{ message or 'No message provided' }}</p>
             </div>
             
             <p>Please review this request and decide whether to approve or decline it. You can manage all join requests from your group dashboard.</p>
@@ -144,49 +141,18 @@ def get_join_request_template(group_name: str, requester_name: str, requester_em
         </div>
         <div class="footer">
             <p>This is an automated message from Procur</p>
-            <p>You're receiving this because you're an admin of {group_name}</p>
+            <p>You're receiving this because you're an admin of {{ group_name }}</p>
         </div>
-    """
-    
-    html_body = get_base_html_template().format(content=content)
-    
-    text_body = f"""
-    New Join Request for {group_name}
-    
-    Hi there!
-    
-    You have a new join request for your group {group_name}.
-    
-    Request Details:
-    - Requester: {requester_name}
-    - Email: {requester_email}
-    - Message: {message or 'No message provided'}
-    
-    Please review this request in your Procur dashboard and decide whether to approve or decline it.
-    
-    This is an automated message from Procur
-    You're receiving this because you're an admin of {group_name}
-    """
-    
-    return EmailTemplate(
-        subject=subject,
-        html_body=html_body,
-        text_body=text_body
-    )
+    {% endblock %}"""
 
-def get_join_approved_template(group_name: str, user_name: str) -> EmailTemplate:
-    """Email template for join approval notifications"""
-    
-    subject = f"Welcome to {group_name}! 🎉"
-    
-    content = f"""
+_JOIN_APPROVED_HTML = """{% extends "base.html" %}{% block content %}
         <div class="header">
             <h1>🎉 Welcome aboard!</h1>
-            <p>You've been approved to join {group_name}</p>
+            <p>You've been approved to join {{ group_name }}</p>
         </div>
         <div class="content">
-            <p><strong>Hi {user_name}!</strong></p>
-            <p>Great news! Your request to join <span class="highlight">{group_name}</span> has been approved.</p>
+            <p><strong>Hi {{ user_name }}!</strong></p>
+            <p>Great news! Your request to join <span class="highlight">{{ group_name }}</span> has been approved.</p>
             
             <div class="info-box">
                 <h3>What's next?</h3>
@@ -208,49 +174,15 @@ def get_join_approved_template(group_name: str, user_name: str) -> EmailTemplate
             <p>This is an automated message from Procur</p>
             <p>Happy purchasing! 🛒</p>
         </div>
-    """
-    
-    html_body = get_base_html_template().format(content=content)
-    
-    text_body = f"""
-    Welcome to {group_name}!
-    
-    Hi {user_name}!
-    
-    Great news! Your request to join {group_name} has been approved.
-    
-    What's next?
-    • Explore the group's current purchasing campaigns
-    • Connect with other members in your industry
-    • Start saving with group purchasing power
-    • Participate in group discussions and planning
-    
-    You can now access all group features and start benefiting from collective purchasing power. Welcome to the community!
-    
-    Visit your Procur dashboard to get started.
-    
-    This is an automated message from Procur
-    Happy purchasing!
-    """
-    
-    return EmailTemplate(
-        subject=subject,
-        html_body=html_body,
-        text_body=text_body
-    )
+    {% endblock %}"""
 
-def get_welcome_template(user_name: str) -> EmailTemplate:
-    """Welcome email template for new users"""
-    
-    subject = "Welcome to Procur! 🚀"
-    
-    content = f"""
+_WELCOME_HTML = """{% extends "base.html" %}{% block content %}
         <div class="header">
             <h1>🚀 Welcome to Procur!</h1>
             <p>Your journey to smarter purchasing starts here</p>
         </div>
         <div class="content">
-            <p><strong>Hi {user_name}!</strong></p>
+            <p><strong>Hi {{ user_name }}!</strong></p>
             <p>Welcome to Procur! You've just joined a community that's revolutionizing how businesses approach purchasing through the power of group buying.</p>
             
             <div class="info-box">
@@ -280,15 +212,170 @@ def get_welcome_template(user_name: str) -> EmailTemplate:
             <p>This is an automated welcome message from Procur</p>
             <p>Questions? Reply to this email or contact our support team</p>
         </div>
+    {% endblock %}"""
+
+_INVITATION_HTML = """{% extends "base.html" %}{% block content %}
+        <div class="header">
+            <h1>🎉 You're Invited!</h1>
+            <p>Join {{ group_name }} on Procur</p>
+        </div>
+        <div class="content">
+            <p><strong>Hi there!</strong></p>
+            <p><span class="highlight">{{ inviter_name }}</span> has invited you to join <span class="highlight">{{ group_name }}</span> on Procur.</p>
+            
+            {% if group_description %}<p><em>"{{ group_description }}"</em></p>{% endif %}
+            
+            <div class="info-box">
+                <h3>Why join this group?</h3>
+                <ul>
+                    <li><strong>Better pricing:</strong> Access exclusive group discounts from verified suppliers</li>
+                    <li><strong>Industry connections:</strong> Network with other businesses in your field</li>
+                    <li><strong>Streamlined purchasing:</strong> Simplified procurement process</li>
+                    <li><strong>Transparent pricing:</strong> See exactly what you're paying and why</li>
+                    <li><strong>Bulk buying power:</strong> Leverage collective volume for better deals</li>
+                </ul>
+            </div>
+            
+            <p>Procur helps businesses like yours save money and time through the power of group purchasing. Join thousands of companies already benefiting from our platform.</p>
+            
+            <div class="center">
+                <a href="{{ invitation_url }}" class="button">Join {{ group_name }}</a>
+            </div>
+            
+            <p><strong>New to Procur?</strong> No problem! You'll be able to create your account as part of the joining process. It only takes a minute.</p>
+            
+            <p style="font-size: 14px; color: #64748b; margin-top: 30px;">
+                <strong>Note:</strong> This invitation link will expire in 7 days. 
+                Don't worry - if you miss it, you can always request to join the group directly.
+            </p>
+        </div>
+        <div class="footer">
+            <p>This invitation was sent by {{ inviter_name }} via Procur</p>
+            <p>Questions about Procur? <a href="#" style="color: #667eea;">Contact our support team</a></p>
+        </div>
+    {% endblock %}"""
+
+_PASSWORD_RESET_HTML = """{% extends "base.html" %}{% block content %}
+       <div class="header">
+           <h1>🔒 Password Reset</h1>
+           <p>Reset your Procur account password</p>
+       </div>
+       <div class="content">
+           <p><strong>Hi {{ user_name }}!</strong></p>
+           <p>We received a request to reset the password for your Procur account.</p>
+           
+           <div class="center">
+               <a href="{{ reset_url }}" class="button">Reset Password</a>
+           </div>
+           
+           <p>This link will expire in 1 hour for security reasons.</p>
+           
+           <p><strong>Didn't request this?</strong> You can safely ignore this email. Your password won't be changed unless you click the link above.</p>
+           
+           <p>For security, this reset link will only work once. If you need to reset your password again, you'll need to request a new link.</p>
+       </div>
+       <div class="footer">
+           <p>This is an automated security message from Procur</p>
+           <p>Never share your password or reset links with anyone</p>
+       </div>
+    {% endblock %}"""
+
+# Compiled once per process and cached by the environment; autoescape covers every dynamic field
+_env = Environment(
+    loader=DictLoader({
+        "base.html": _BASE_HTML_TEMPLATE,
+        "join_request.html": _JOIN_REQUEST_HTML,
+        "join_approved.html": _JOIN_APPROVED_HTML,
+        "welcome.html": _WELCOME_HTML,
+        "invitation.html": _INVITATION_HTML,
+        "password_reset.html": _PASSWORD_RESET_HTML,
+    }),
+    autoescape=True,
+    auto_reload=False,
+)
+
+def _render_html(template_name: str, **context: Any) -> str:
+    """Render one of the HTML email templates"""
+    return _env.get_template(template_name).render(**context)
+
+def get_join_request_template(group_name: str, requester_name: str, requester_email: str, message: str, request_id: str) -> EmailTemplate:
+    """Email template for join request notifications"""
+    
+    subject = f"New join request for {group_name}"
+    
+    html_body = _render_html(
+        "join_request.html",
+        group_name=group_name, requester_name=requester_name,
+        requester_email=requester_email, message=message
+    )
+    
+    text_body = f"""
+    New Join Request for {group_name}
+    
+    Hi there!
+    
+    You have a new join request for your group {group_name}.
+    
+    Request Details:
+    - Requester: {requester_name}
+    - Email: {requester_email}
+    - Message: {message or 'No message provided'}
+    
+    Please review this request in your Procur dashboard and decide whether to approve or decline it.
+    
+    This is an automated message from Procur
+    You're receiving this because you're an admin of {group_name}
     """
     
-    html_body = get_base_html_template().format(content=content)
+    return EmailTemplate(
+        subject=subject,
+        html_body=html_body,
+        text_body=text_body
+    )
+
+@lru_cache(maxsize=512)
+def get_join_approved_template(group_name: str, user_name: str) -> EmailTemplate:
+    """Email template for join approval notifications"""
+    
+    subject = f"Welcome to {group_name}! 🎉"
+    
+    html_body = _render_html("join_approved.html", group_name=group_name, user_name=user_name)
     
     text_body = f"""
-    Welcome to Procur!
+    Welcome to {group_name}!
     
     Hi {user_name}!
     
+    Great news! Your request to join {group_name} has been approved.
+    
+    What's next?
+    • Explore the group's current purchasing campaigns
+    • Connect with other members in your industry
+    • Start saving with group purchasing power
+    • Participate in group discussions and planning
+    
+    You can now access all group features and start benefiting from collective purchasing power. Welcome to the community!
+    
+    Visit your Procur dashboard to get started.
+    
+    This is an automated message from Procur
+    Happy purchasing!
+    """
+    
+    return EmailTemplate(
+        subject=subject,
+        html_body=html_body,
+        text_body=text_body
+    )
+
+# Static segments of the welcome and password reset text bodies, split around their few substitutions
+_WELCOME_TEXT_HEAD = """
+    Welcome to Procur!
+    
+    Hi """
+
+_WELCOME_TEXT_TAIL = """!
+    
     Welcome to Procur! You've just joined a community that's revolutionizing how businesses approach purchasing through the power of group buying.
     
     What you can do with Procur:
@@ -309,6 +396,39 @@ def get_welcome_template(user_name: str) -> EmailTemplate:
     This is an automated welcome message from Procur
     Questions? Reply to this email or contact our support team
     """
+
+_PASSWORD_RESET_TEXT_HEAD = """
+    Reset your Procur password
+   
+    Hi """
+
+_PASSWORD_RESET_TEXT_MID = """!
+   
+    We received a request to reset the password for your Procur account.
+   
+    Reset your password: """
+
+_PASSWORD_RESET_TEXT_TAIL = """
+   
+    This link will expire in 1 hour for security reasons.
+   
+    Didn't request this? You can safely ignore this email. Your password won't be changed unless you click the link above.
+   
+    For security, this reset link will only work once. If you need to reset your password again, you'll need to request a new link.
+   
+    This is an automated security message from Procur
+    Never share your password or reset links with anyone
+    """
+
+@lru_cache(maxsize=512)
+def get_welcome_template(user_name: str) -> EmailTemplate:
+    """Welcome email template for new users"""
+    
+    subject = "Welcome to Procur! 🚀"
+    
+    html_body = _render_html("welcome.html", user_name=user_name)
+    
+    text_body = _WELCOME_TEXT_HEAD + user_name + _WELCOME_TEXT_TAIL
     
     return EmailTemplate(
         subject=subject,
@@ -321,48 +441,14 @@ def get_invitation_template(group_name: str, inviter_name: str, invitation_url:
     
     subject = f"Join {group_name} on Procur - Invitation from {inviter_name}"
     
-    content = f"""
-        <div class="header">
-            <h1>🎉 You're Invited!</h1>
-            <p>Join {group_name} on Procur</p>
-        </div>
-        <div class="content">
-            <p><strong>Hi there!</strong></p>
-            <p><span class="highlight">{inviter_name}</span> has invited you to join <span class="highlight">{group_name}</span> on Procur.</p>
-            
-            {f'<p><em>"{group_description}"</em></p>' if group_description else ''}
-            
-            <div class="info-box">
-                <h3>Why join this group?</h3>
-                <ul>
-                    <li><strong>Better pricing:</strong> Access exclusive group discounts from verified suppliers</li>
-                    <li><strong>Industry connections:</strong> Network with other businesses in your field</li>
-                    <li><strong>Streamlined purchasing:</strong> Simplified procurement process</li>
-                    <li><strong>Transparent pricing:</strong> See exactly what you're paying and why</li>
-                    <li><strong>Bulk buying power:</strong> Leverage collective volume for better deals</li>
-                </ul>
-            </div>
-            
-            <p>Procur helps businesses like yours save money and time through the power of group purchasing. Join thousands of companies already benefiting from our platform.</p>
-            
-            <div class="center">
-                <a href="{invitation_url}" class="button">Join {group_name}</a>
-            </div>
-            
-            <p><strong>New to Procur?</strong> No problem! You'll be able to create your account as part of the joining process. It only takes a minute.</p>
-            
-            <p style="font-size: 14px; color: #64748b; margin-top: 30px;">
-                <strong>Note:</strong> This invitation link will expire in 7 days. 
-                Don't worry - if you miss it, you can always request to join the group directly.
-            </p>
-        </div>
-        <div class="footer">
-            <p>This invitation was sent by {inviter_name} via Procur</p>
-            <p>Questions about Procur? <a href="#" style="color: #667eea;">Contact our support team</a></p>
-        </div>
-    """
+    # Resolve the optional description line once instead of inside the text f-string
+    description_text = f'"{group_description}"' if group_description else ""
     
-    html_body = get_base_html_template().format(content=content)
+    html_body = _render_html(
+        "invitation.html",
+        group_name=group_name, inviter_name=inviter_name,
+        invitation_url=invitation_url, group_description=group_description
+    )
     
     text_body = f"""
     You're Invited to Join {group_name} on Procur!
@@ -371,7 +457,7 @@ def get_invitation_template(group_name: str, inviter_name: str, invitation_url:
     
     {inviter_name} has invited you to join {group_name} on Procur.
     
-    {f'"{group_description}"' if group_description else ''}
+    {description_text}
     
     Why join this group?
     • Better pricing: Access exclusive group discounts from verified suppliers
@@ -403,51 +489,9 @@ def get_password_reset_template(user_name: str, reset_url: str) -> EmailTemplate
    
     subject = "Reset your Procur password"
    
-    content = f"""
-       <div class="header">
-           <h1>🔒 Password Reset</h1>
-           <p>Reset your Procur account password</p>
-       </div>
-       <div class="content">
-           <p><strong>Hi {user_name}!</strong></p>
-           <p>We received a request to reset the password for your Procur account.</p>
-           
-           <div class="center">
-               <a href="{reset_url}" class="button">Reset Password</a>
-           </div>
-           
-           <p>This link will expire in 1 hour for security reasons.</p>
-           
-           <p><strong>Didn't request this?</strong> You can safely ignore this email. Your password won't be changed unless you click the link above.</p>
-           
-           <p>For security, this reset link will only work once. If you need to reset your password again, you'll need to request a new link.</p>
-       </div>
-       <div class="footer">
-           <p>This is an automated security message from Procur</p>
-           <p>Never share your password or reset links with anyone</p>
-       </div>
-    """
+    html_body = _render_html("password_reset.html", user_name=user_name, reset_url=reset_url)
    
-    html_body = get_base_html_template().format(content=content)
-   
-    text_body = f"""
-    Reset your Procur password
-   
-    Hi {user_name}!
-   
-    We received a request to reset the password for your Procur account.
-   
-    Reset your password: {reset_url}
-   
-    This link will expire in 1 hour for security reasons.
-   
-    Didn't request this? You can safely ignore this email. Your password won't be changed unless you click the link above.
-   
-    For security, this reset link will only work once. If you need to reset your password again, you'll need to request a new link.
-   
-    This is an automated security message from Procur
-    Never share your password or reset links with anyone
-    """
+    text_body = _PASSWORD_RESET_TEXT_HEAD + user_name + _PASSWORD_RESET_TEXT_MID + reset_url + _PASSWORD_RESET_TEXT_TAIL
    
     return EmailTemplate(
        subject=subject,
@@ -455,26 +499,47 @@ def get_password_reset_template(user_name: str, reset_url: str) -> EmailTemplate
        text_body=text_body
     )
 
+def clear_template_cache():
+    """Drop memoized renders, e.g. after template copy changes"""
+    get_join_approved_template.cache_clear()
+    get_welcome_template.cache_clear()
+
+def _render_welcome(d: Dict[str, Any]) -> EmailTemplate:
+    return get_welcome_template(d["user_name"])
+
+def _render_join_request(d: Dict[str, Any]) -> EmailTemplate:
+    return get_join_request_template(
+        d["group_name"], d["requester_name"], d["requester_email"],
+        d.get("message", ""), d["request_id"]
+    )
+
+def _render_join_approved(d: Dict[str, Any]) -> EmailTemplate:
+    return get_join_approved_template(d["group_name"], d["user_name"])
+
+def _render_invitation(d: Dict[str, Any]) -> EmailTemplate:
+    return get_invitation_template(
+        d["group_name"], d["inviter_name"], d["invitation_url"],
+        d.get("group_description", "")
+    )
+
+def _render_password_reset(d: Dict[str, Any]) -> EmailTemplate:
+    return get_password_reset_template(d["user_name"], d["reset_url"])
+
+_TEMPLATE_DISPATCH = {
+    "welcome": _render_welcome,
+    "join_request": _render_join_request,
+    "join_approved": _render_join_approved,
+    "invitation": _render_invitation,
+    "password_reset": _render_password_reset,
+}
+
 def get_template_by_name(template_name: str, data: Dict[str, Any]) -> EmailTemplate:
     """Get email template by name with data substitution"""
-   
-    template_functions = {
-        "welcome": lambda d: get_welcome_template(d["user_name"]),
-        "join_request": lambda d: get_join_request_template(
-           d["group_name"], d["requester_name"], d["requester_email"], 
-           d.get("message", ""), d["request_id"]
-        ),
-        "join_approved": lambda d: get_join_approved_template(d["group_name"], d["user_name"]),
-        "invitation": lambda d: get_invitation_template(
-           d["group_name"], d["inviter_name"], d["invitation_url"], 
-           d.get("group_description", "")
-        ),
-        "password_reset": lambda d: get_password_reset_template(d["user_name"], d["reset_url"])
-    }
-   
-    if template_name not in template_functions:
-       raise ValueError(f"Unknown template: {template_name}")
-   
-    return template_functions[template_name](data)
+    try:
+        render = _TEMPLATE_DISPATCH[template_name]
+    except KeyError:
+        raise ValueError(f"Unknown template: {template_name}")
+    
+    return render(data)
 
 # EOF
\ No newline at end of file
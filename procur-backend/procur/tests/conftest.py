@@ -1,176 +1,343 @@
+import httpx
+import os
 import pytest
-import asyncio
+from contextlib import ExitStack
 from unittest.mock import Mock, AsyncMock, patch
+from fastapi.security import HTTPAuthorizationCredentials
 from fastapi.testclient import TestClient
-from procur.main import app
+from procur.core.dependencies import get_current_user
 from procur.core.firebase import get_firestore_client
 from procur.models.schemas import UserResponse, UserRole
 from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
 
-# Load test environment configuration
-import test_env
+# Frozen clock: fixture timestamps and the dependencies' utcnow() all use this
+_NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+# Read-only Firestore payloads shared by every test that needs them
+_JOIN_REQUEST_DATA = MappingProxyType({
+    'id': 'request_123',
+    'group_id': 'test_group_789',
+    'user_id': 'test_user_123',
+    'status': 'pending',
+    'message': 'Please approve my request'
+})
+
+_ADMIN_MEMBER_DATA = MappingProxyType({
+    'user_id': 'test_user_123',
+    'role': 'admin',
+    'joined_at': _NOW
+})
+
+_INVITATION_DATA = MappingProxyType({
+    'id': 'invitation_123',
+    'group_id': 'test_group_789',
+    'token': 'invite_token',
+    'is_active': True,
+    'current_uses': 0
+})
+
+_MEMBER_DATA = MappingProxyType({
+    'user_id': 'test_user_123',
+    'role': 'member',
+    'joined_at': _NOW
+})
+
+# Default verify_firebase_token result, issued at the frozen clock time
+_TOKEN_DATA = {
+    'uid': 'test_user_123',
+    'disabled': False,
+    'iat': int(_NOW.timestamp())
+}
+
+# Authenticated users injected through app.dependency_overrides
+ADMIN_USER = UserResponse(
+    uid='admin_user_456',
+    email='admin@example.com',
+    display_name='Admin User',
+    created_at=_NOW,
+    updated_at=_NOW,
+    is_active=True
+)
+
+NORMAL_USER = UserResponse(
+    uid='test_user_123',
+    email='test@example.com',
+    display_name='Test User',
+    created_at=_NOW,
+    updated_at=_NOW,
+    is_active=True
+)
+
+class _FrozenDatetime(datetime):
+    """datetime whose utcnow() is pinned to _NOW"""
+
+    @classmethod
+    def utcnow(cls):
+        return _NOW.replace(tzinfo=None)
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    """Pin the clock used for token age checks in procur.core.dependencies"""
+    monkeypatch.setattr('procur.core.dependencies.datetime', _FrozenDatetime)
+    return _NOW
+
+# Environment the app is tested under; variables already set in the shell win
+_TEST_ENV = MappingProxyType({
+    "ALLOWED_HOSTS": '["*"]',
+    "ENVIRONMENT": "test",
+    "DEBUG": "true",
+})
+
+def pytest_configure(config):
+    """Set the test environment before collection, so it is in place before the app reads its settings"""
+    for name, value in _TEST_ENV.items():
+        os.environ.setdefault(name, value)
+
+# (mock_firebase key, patch target) pairs for the Firebase entry points.
+# Route modules bind get_firestore_client at import, so each one is patched where
+# it is looked up; uploads imports it inside its handlers, from procur.core.firebase.
+_FIREBASE_PATCH_TARGETS = (
+    ('verify_token', 'procur.core.dependencies.verify_firebase_token'),
+    ('firestore', 'procur.core.dependencies.get_firestore_client'),
+    ('firestore', 'procur.api.routes.groups.get_firestore_client'),
+    ('firestore', 'procur.api.routes.invitations.get_firestore_client'),
+    ('firestore', 'procur.api.routes.users.get_firestore_client'),
+    ('firestore', 'procur.core.firebase.get_firestore_client'),
+    ('blacklist', 'procur.core.dependencies.blacklist_token'),
+    ('verify_firebase', 'procur.core.firebase.verify_firebase_token'),
+)
+
+class _FakeDoc:
+    """Lightweight stand-in for an existing Firestore DocumentSnapshot"""
+    __slots__ = ("exists", "_data")
+
+    def __init__(self, data):
+        self.exists = True
+        self._data = data
+
+    def to_dict(self):
+        return self._data
 
 # Test client
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    """Test client for FastAPI app with custom headers"""
-    # Create test client with custom headers to avoid host validation issues
+    """Test client for FastAPI app with custom headers, shared by the whole session"""
+    # Imported here so settings are read after pytest_configure has run
+    from procur.main import app
+    # Create test client with custom headers to avoid host validation issues.
+    # Not entered as a context manager: the lifespan would initialize Firebase.
     return TestClient(app, headers={"Host": "localhost"})
 
+@pytest.fixture
+async def async_client(client):
+    """Async client calling the ASGI app directly on the test's event loop"""
+    transport = httpx.ASGITransport(app=client.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as c:
+        yield c
+
+@pytest.fixture
+def client_iso(client):
+    """Shared test client that clears dependency overrides after the test"""
+    yield client
+    client.app.dependency_overrides.clear()
+
+@pytest.fixture
+def as_admin(client_iso):
+    """Authenticate requests as ADMIN_USER through dependency_overrides"""
+    client_iso.app.dependency_overrides[get_current_user] = lambda: ADMIN_USER
+    return ADMIN_USER
+
+@pytest.fixture
+def as_user(client_iso):
+    """Authenticate requests as NORMAL_USER through dependency_overrides"""
+    client_iso.app.dependency_overrides[get_current_user] = lambda: NORMAL_USER
+    return NORMAL_USER
+
+@pytest.fixture
+def admin_client(as_admin, async_client):
+    """async_client authenticated as ADMIN_USER"""
+    return async_client
+
+@pytest.fixture
+def user_client(as_user, async_client):
+    """async_client authenticated as NORMAL_USER"""
+    return async_client
+
 # Mock Firebase dependencies
+@pytest.fixture(scope="session")
+def _mock_firebase_base():
+    """Firebase mock tree and its patchers, built once per session"""
+    mocks = {
+        key: Mock() for key in (
+            'verify_token', 'verify_firebase', 'firestore', 'blacklist', 'db',
+            'collection', 'document', 'members_collection', 'member_document'
+        )
+    }
+    patchers = [patch(target, new=mocks[key]) for key, target in _FIREBASE_PATCH_TARGETS]
+    return mocks, patchers
+
 @pytest.fixture
-def mock_firebase():
+def mock_firebase(_mock_firebase_base):
     """Mock Firebase services for testing"""
-    # Import time to get current timestamp
-    import time
-    current_time = int(time.time())
+    mocks, patchers = _mock_firebase_base
     
-    # Create the mock return value for verify_firebase_token
-    mock_token_data = {
-        'uid': 'test_user_123', 
-        'disabled': False, 
-        'iat': current_time
-    }
+    # Clear anything the previous test configured on the shared mocks
+    for mock in mocks.values():
+        mock.reset_mock(return_value=True, side_effect=True)
+    
+    # Configure the mocks to return the dictionary directly
+    mocks['verify_token'].return_value = _TOKEN_DATA
+    mocks['verify_firebase'].return_value = _TOKEN_DATA
+    
+    # Set up basic chain for tests that need it
+    mocks['firestore'].return_value = mocks['db']
+    mocks['db'].collection.return_value = mocks['collection']
+    mocks['collection'].document.return_value = mocks['document']
+    mocks['document'].collection.return_value = mocks['members_collection']
+    mocks['members_collection'].document.return_value = mocks['member_document']
     
-    # Patch the function at the module level where it's used
-    with patch('procur.core.dependencies.verify_firebase_token') as mock_verify, \
-         patch('procur.core.dependencies.get_firestore_client') as mock_firestore, \
-         patch('procur.core.dependencies.blacklist_token') as mock_blacklist, \
-         patch('procur.core.firebase.verify_firebase_token') as mock_verify_firebase:
-        
-        # Configure the mocks to return the dictionary directly
-        mock_verify.return_value = mock_token_data
-        mock_verify_firebase.return_value = mock_token_data
-        
-        # Create a simple mock that returns basic data
-        mock_db = Mock()
-        mock_firestore.return_value = mock_db
-        
-        # Create mock objects that the tests expect
-        mock_collection = Mock()
-        mock_document = Mock()
-        mock_members_collection = Mock()
-        mock_member_document = Mock()
-        
-        # Set up basic chain for tests that need it
-        mock_db.collection.return_value = mock_collection
-        mock_collection.document.return_value = mock_document
-        mock_document.collection.return_value = mock_members_collection
-        mock_members_collection.document.return_value = mock_member_document
-        
-        yield {
-            'verify_token': mock_verify,
-            'verify_firebase': mock_verify_firebase,
-            'firestore': mock_firestore,
-            'blacklist': mock_blacklist,
-            'db': mock_db,
-            'collection': mock_collection,
-            'document': mock_document,
-            'members_collection': mock_members_collection,
-            'member_document': mock_member_document
-        }
+    # Patch the functions at the module level where they're used
+    with ExitStack() as stack:
+        for patcher in patchers:
+            stack.enter_context(patcher)
+        yield mocks
 
-# Test user data
 @pytest.fixture
+def firestore_patch(monkeypatch, test_group_data):
+    """Patch only the dependencies' Firestore client with a prewired group/member chain"""
+    mock_db = Mock()
+    group_ref = mock_db.collection.return_value.document.return_value
+    member_ref = group_ref.collection.return_value.document.return_value
+    
+    # Snapshots default to an existing public group and an existing membership
+    group_ref.get.return_value = Mock(exists=True, **{'to_dict.return_value': test_group_data})
+    member_ref.get.return_value = Mock(exists=True)
+    
+    monkeypatch.setattr('procur.core.dependencies.get_firestore_client', lambda: mock_db)
+    return {
+        'db': mock_db,
+        'group_doc': group_ref.get.return_value,
+        'member_doc': member_ref.get.return_value
+    }
+
+# Test user data
+@pytest.fixture(scope="session")
 def test_user_data():
     """Sample user data for testing"""
-    return {
+    return MappingProxyType({
         'email': 'test@example.com',
         'display_name': 'Test User',
         'status': 'active',
-        'created_at': datetime.now(timezone.utc),
-        'updated_at': datetime.now(timezone.utc),
+        'created_at': _NOW,
+        'updated_at': _NOW,
         'is_active': True,
         'role': UserRole.MEMBER
-    }
+    })
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_admin_user_data():
     """Sample admin user data for testing"""
-    return {
+    return MappingProxyType({
         'email': 'admin@example.com',
         'display_name': 'Admin User',
         'status': 'active',
-        'created_at': datetime.now(timezone.utc),
-        'updated_at': datetime.now(timezone.utc),
+        'created_at': _NOW,
+        'updated_at': _NOW,
         'is_active': True,
         'role': UserRole.ADMIN
-    }
+    })
 
-@pytest.fixture
-def test_user_data_with_uid():
-    """Sample user data with uid for group tests"""
-    return {
-        'uid': 'test_user_123',
-        'email': 'test@example.com',
-        'display_name': 'Test User',
-        'status': 'active',
-        'created_at': datetime.now(timezone.utc),
-        'updated_at': datetime.now(timezone.utc),
-        'is_active': True,
-        'role': UserRole.MEMBER
-    }
+@pytest.fixture(scope="session")
+def admin_user_response():
+    """Validated admin UserResponse, built once"""
+    return ADMIN_USER
 
-@pytest.fixture
-def test_admin_user_data_with_uid():
-    """Sample admin user data with uid for group tests"""
-    return {
-        'uid': 'admin_user_456',
-        'email': 'admin@example.com',
-        'display_name': 'Admin User',
-        'status': 'active',
-        'created_at': datetime.now(timezone.utc),
-        'updated_at': datetime.now(timezone.utc),
-        'is_active': True,
-        'role': UserRole.ADMIN
-    }
+@pytest.fixture(scope="session")
+def normal_user_response():
+    """Validated member UserResponse, built once"""
+    return NORMAL_USER
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_group_data():
     """Sample group data for testing"""
-    return {
+    return MappingProxyType({
         'id': 'test_group_789',
         'name': 'Test Group',
         'description': 'A test group',
         'admin_id': 'admin_user_456',
         'privacy': 'public',
         'is_active': True,
-        'created_at': datetime.now(timezone.utc),
+        'created_at': _NOW,
         'member_count': 2
-    }
+    })
 
-@pytest.fixture
-def mock_user_document(test_user_data):
+@pytest.fixture(scope="session")
+def make_doc():
+    """Factory for existing Firestore document snapshots returning the given data"""
+    return _FakeDoc
+
+@pytest.fixture(scope="session")
+def mock_user_document(make_doc, test_user_data):
     """Mock Firestore user document"""
-    mock_doc = Mock()
-    mock_doc.exists = True
-    mock_doc.to_dict.return_value = test_user_data
-    return mock_doc
+    return make_doc(test_user_data)
 
-@pytest.fixture
-def mock_admin_document(test_admin_user_data):
+@pytest.fixture(scope="session")
+def mock_admin_document(make_doc, test_admin_user_data):
     """Mock Firestore admin user document"""
-    mock_doc = Mock()
-    mock_doc.exists = True
-    mock_doc.to_dict.return_value = test_admin_user_data
-    return mock_doc
+    return make_doc(test_admin_user_data)
 
-@pytest.fixture
-def mock_group_document(test_group_data):
+@pytest.fixture(scope="session")
+def mock_group_document(make_doc, test_group_data):
     """Mock Firestore group document"""
+    return make_doc(test_group_data)
+
+def _mock_doc_ref(data):
+    """Mock that serves as both a Firestore document reference and its snapshot"""
     mock_doc = Mock()
     mock_doc.exists = True
-    mock_doc.to_dict.return_value = test_group_data
+    mock_doc.to_dict.return_value = data
+    mock_doc.get.return_value = mock_doc
     return mock_doc
 
+@pytest.fixture
+def mock_group_doc(test_group_data):
+    """Mock group document reference"""
+    return _mock_doc_ref(test_group_data)
+
+@pytest.fixture
+def mock_join_request_doc():
+    """Mock pending join request document reference"""
+    return _mock_doc_ref(_JOIN_REQUEST_DATA)
+
+@pytest.fixture
+def mock_invitation_doc():
+    """Mock active invitation document reference"""
+    return _mock_doc_ref(_INVITATION_DATA)
+
+@pytest.fixture
+def mock_admin_member_doc():
+    """Mock group member document reference for an admin"""
+    return _mock_doc_ref(_ADMIN_MEMBER_DATA)
+
+@pytest.fixture
+def mock_member_doc():
+    """Mock group member document reference for a regular member"""
+    return _mock_doc_ref(_MEMBER_DATA)
+
+@pytest.fixture
+def mock_credentials():
+    """Bearer credentials as HTTPBearer would produce them"""
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials="test_token")
+
 @pytest.fixture
 def valid_token_payload():
     """Valid Firebase token payload for testing"""
     return {
         'uid': 'test_user_123',
         'email': 'test@example.com',
-        'iat': datetime.now(timezone.utc).timestamp(),
-        'exp': (datetime.now(timezone.utc) + timedelta(hours=1)).timestamp(),
+        'iat': _NOW.timestamp(),
+        'exp': (_NOW + timedelta(hours=1)).timestamp(),
         'disabled': False
     }
 
@@ -180,15 +347,7 @@ def expired_token_payload():
     return {
         'uid': 'test_user_123',
         'email': 'test@example.com',
-        'iat': (datetime.now(timezone.utc) - timedelta(days=2)).timestamp(),
-        'exp': (datetime.now(timezone.utc) - timedelta(days=1)).timestamp(),
+        'iat': (_NOW - timedelta(days=2)).timestamp(),
+        'exp': (_NOW - timedelta(days=1)).timestamp(),
         'disabled': False
     }
-
-# Async test support
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session"""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import Mock, patch, AsyncMock
+from unittest.mock import Mock, AsyncMock
 from fastapi import HTTPException, Depends
 from procur.core.dependencies import (
     get_current_user,
@@ -8,13 +8,12 @@ from procur.core.dependencies import (
     enforce_group_privacy,
     get_user_group_role
 )
-from procur.models.schemas import UserResponse, UserRole
-from datetime import datetime, timedelta, timezone
+from procur.models.schemas import UserRole
+from datetime import timedelta
 
 class TestGetCurrentUser:
     """Test the get_current_user dependency"""
     
-    @pytest.mark.asyncio
     async def test_valid_token_success(self, mock_firebase, valid_token_payload, mock_user_document):
         """Test successful authentication with valid token"""
         # Setup mocks
@@ -40,7 +39,6 @@ class TestGetCurrentUser:
         # Verify Firebase was called correctly
         mock_firebase['verify_token'].assert_called_once_with("valid_token_123", check_rate_limit=True)
     
-    @pytest.mark.asyncio
     async def test_expired_token_failure(self, mock_firebase, expired_token_payload, mock_user_document):
         """Test authentication failure with expired token"""
         # Setup mocks
@@ -63,14 +61,13 @@ class TestGetCurrentUser:
             "Authentication failed"
         ]
     
-    @pytest.mark.asyncio
-    async def test_disabled_user_failure(self, mock_firebase):
+    async def test_disabled_user_failure(self, mock_firebase, frozen_clock):
         """Test authentication failure with disabled user"""
         # Setup mocks
         disabled_token = {
             'uid': 'disabled_user_123',
             'email': 'disabled@example.com',
-            'iat': datetime.now(timezone.utc).timestamp(),
+            'iat': frozen_clock.timestamp(),
             'disabled': True
         }
         mock_firebase['verify_token'].return_value = disabled_token
@@ -89,16 +86,13 @@ class TestGetCurrentUser:
 class TestRequireGroupAdmin:
     """Test the require_group_admin dependency"""
     
-    @pytest.mark.asyncio
-    async def test_admin_user_success(self, mock_firebase, test_group_data, test_admin_user_data_with_uid):
+    async def test_admin_user_success(self, mock_firebase, test_group_data, admin_user_response, make_doc):
         """Test successful admin access"""
         # Setup mocks
         mock_firebase['verify_token'].return_value = {'uid': 'admin_user_456', 'disabled': False}
         
         # Mock member document (admin)
-        mock_member_doc = Mock()
-        mock_member_doc.exists = True
-        mock_member_doc.to_dict.return_value = {'role': 'admin'}
+        mock_member_doc = make_doc({'role': 'admin'})
         
         # Setup Firestore mocks for member check
         mock_firebase['member_document'].get.return_value = mock_member_doc
@@ -110,7 +104,7 @@ class TestRequireGroupAdmin:
         
         # Test the dependency
         result = await require_group_admin(
-            UserResponse(**test_admin_user_data_with_uid),
+            admin_user_response,
             mock_request
         )
         
@@ -120,16 +114,13 @@ class TestRequireGroupAdmin:
         # Verify Firestore was called correctly
         mock_firebase['firestore'].assert_called_once()
     
-    @pytest.mark.asyncio
-    async def test_non_admin_user_failure(self, mock_firebase, test_group_data, test_user_data_with_uid):
+    async def test_non_admin_user_failure(self, mock_firebase, test_group_data, normal_user_response, make_doc):
         """Test failure for non-admin user"""
         # Setup mocks
         mock_firebase['verify_token'].return_value = {'uid': 'test_user_123', 'disabled': False}
         
         # Mock member document (non-admin)
-        mock_member_doc = Mock()
-        mock_member_doc.exists = True
-        mock_member_doc.to_dict.return_value = {'role': 'member'}
+        mock_member_doc = make_doc({'role': 'member'})
         
         # Setup Firestore mocks for member check
         mock_firebase['member_document'].get.return_value = mock_member_doc
@@ -142,7 +133,7 @@ class TestRequireGroupAdmin:
         # Test the dependency should raise HTTPException
         with pytest.raises(HTTPException) as exc_info:
             await require_group_admin(
-                UserResponse(**test_user_data_with_uid),
+                normal_user_response,
                 mock_request
             )
         
@@ -152,16 +143,13 @@ class TestRequireGroupAdmin:
 class TestRequireGroupMember:
     """Test the require_group_member dependency"""
     
-    @pytest.mark.asyncio
-    async def test_member_user_success(self, mock_firebase, test_group_data, test_user_data_with_uid):
+    async def test_member_user_success(self, mock_firebase, test_group_data, normal_user_response, make_doc):
         """Test successful member access"""
         # Setup mocks
         mock_firebase['verify_token'].return_value = {'uid': 'test_user_123', 'disabled': False}
         
         # Mock member document (member)
-        mock_member_doc = Mock()
-        mock_member_doc.exists = True
-        mock_member_doc.to_dict.return_value = {'role': 'member'}
+        mock_member_doc = make_doc({'role': 'member'})
         
         # Setup Firestore mocks for member check
         mock_firebase['member_document'].get.return_value = mock_member_doc
@@ -173,15 +161,14 @@ class TestRequireGroupMember:
         
         # Test the dependency
         result = await require_group_member(
-            UserResponse(**test_user_data_with_uid),
+            normal_user_response,
             mock_request
         )
         
         assert result.uid == "test_user_123"
         assert result.email == "test@example.com"
     
-    @pytest.mark.asyncio
-    async def test_non_member_user_failure(self, mock_firebase, test_group_data, test_user_data_with_uid):
+    async def test_non_member_user_failure(self, mock_firebase, test_group_data, normal_user_response):
         """Test failure for non-member user"""
         # Setup mocks
         mock_firebase['verify_token'].return_value = {'uid': 'non_member_999', 'disabled': False}
@@ -201,7 +188,7 @@ class TestRequireGroupMember:
         # Test the dependency should raise HTTPException
         with pytest.raises(HTTPException) as exc_info:
             await require_group_member(
-                UserResponse(**test_user_data_with_uid),
+                normal_user_response,
                 mock_request
             )
         
@@ -211,100 +198,32 @@ class TestRequireGroupMember:
 class TestEnforceGroupPrivacy:
     """Test the enforce_group_privacy dependency"""
     
-    @pytest.mark.asyncio
-    async def test_public_group_access(self, mock_firebase, test_group_data):
+    async def test_public_group_access(self, firestore_patch):
         """Test access to public group"""
-        # Create a mock that returns public group data
-        with patch('procur.core.dependencies.get_firestore_client') as mock_firestore:
-            mock_db = Mock()
-            mock_collection = Mock()
-            mock_document = Mock()
-            mock_group_doc = Mock()
-            
-            mock_group_doc.exists = True
-            mock_group_doc.to_dict.return_value = test_group_data
-            
-            mock_document.get.return_value = mock_group_doc
-            mock_collection.document.return_value = mock_document
-            mock_db.collection.return_value = mock_collection
-            
-            mock_firestore.return_value = mock_db
-            
-            # Test public group access
-            result = await enforce_group_privacy("test_group_789")
-            assert result is True
+        result = await enforce_group_privacy("test_group_789")
+        assert result is True
     
-    @pytest.mark.asyncio
-    async def test_private_group_member_access(self, mock_firebase, test_group_data, test_user_data_with_uid):
+    async def test_private_group_member_access(self, firestore_patch, test_group_data, normal_user_response):
         """Test member access to private group"""
-        # Make group private by patching the mock to return private data
-        private_group_data = {**test_group_data, 'privacy': 'private'}
-        
-        with patch('procur.core.dependencies.get_firestore_client') as mock_firestore:
-            mock_db = Mock()
-            mock_collection = Mock()
-            mock_document = Mock()
-            mock_group_doc = Mock()
-            
-            mock_group_doc.exists = True
-            mock_group_doc.to_dict.return_value = private_group_data
-            
-            # Mock the members subcollection
-            mock_members_collection = Mock()
-            mock_member_document = Mock()
-            mock_member_document.exists = True
-            
-            mock_member_document.get.return_value = mock_member_document
-            mock_members_collection.document.return_value = mock_member_document
-            mock_group_doc.collection.return_value = mock_members_collection
-            
-            mock_document.get.return_value = mock_group_doc
-            mock_collection.document.return_value = mock_document
-            mock_db.collection.return_value = mock_collection
-            
-            mock_firestore.return_value = mock_db
-            
-            # Test member access to private group
-            result = await enforce_group_privacy(
-                "test_group_789",
-                UserResponse(**test_user_data_with_uid)
-            )
-            assert result is True
+        firestore_patch['group_doc'].to_dict.return_value = {**test_group_data, 'privacy': 'private'}
+        
+        result = await enforce_group_privacy(
+            "test_group_789",
+            normal_user_response
+        )
+        assert result is True
     
-    @pytest.mark.asyncio
-    async def test_private_group_non_member_failure(self, mock_firebase, test_group_data, test_user_data_with_uid):
+    @pytest.mark.slow
+    async def test_private_group_non_member_failure(self, firestore_patch, test_group_data, normal_user_response):
         """Test failure for non-member accessing private group"""
-        # Make group private by patching the mock to return private data
-        private_group_data = {**test_group_data, 'privacy': 'private'}
-        
-        # Use a simpler approach - patch the specific function calls
-        with patch('procur.core.dependencies.get_firestore_client') as mock_firestore:
-            # Create a mock that handles the specific calls we need
-            mock_db = Mock()
-            
-            # Mock the group document call
-            mock_group_doc = Mock()
-            mock_group_doc.exists = True
-            mock_group_doc.to_dict.return_value = private_group_data
-            
-            # Mock the member document call
-            mock_member_doc = Mock()
-            mock_member_doc.exists = False
-            
-            # Set up the chain: db.collection('groups').document(group_id).get() -> group_doc
-            mock_db.collection.return_value.document.return_value.get.return_value = mock_group_doc
-            
-            # Set up the chain: db.collection('groups').document(group_id).collection('members').document(uid).get() -> member_doc
-            mock_db.collection.return_value.document.return_value.collection.return_value.document.return_value.get.return_value = mock_member_doc
-            
-            mock_firestore.return_value = mock_db
-            
-            # Test non-member access to private group should raise HTTPException
-            with pytest.raises(HTTPException) as exc_info:
-                await enforce_group_privacy(
-                    "test_group_789",
-                    UserResponse(**test_user_data_with_uid)
-                )
-            
-            assert exc_info.value.status_code == 403
-            assert "Access denied - not a member of this group" in exc_info.value.detail
+        firestore_patch['group_doc'].to_dict.return_value = {**test_group_data, 'privacy': 'private'}
+        firestore_patch['member_doc'].exists = False
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await enforce_group_privacy(
+                "test_group_789",
+                normal_user_response
+            )
+        
+        assert exc_info.value.status_code == 403
+        assert "Access denied - not a member of this group" in exc_info.value.detail
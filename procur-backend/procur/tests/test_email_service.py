@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+import smtplib
+from unittest.mock import MagicMock
+from procur.models.schemas import EmailTemplate
+from procur.services.email_service import EmailService, SMTP_MAX_RETRIES
+
+_TEMPLATE = EmailTemplate(subject="Hello", html_body="<p>Hello</p>", text_body="Hello")
+_TO = "member@example.com"
+
+@pytest.fixture
+def email_svc():
+    """Fresh EmailService so statistics start at zero"""
+    return EmailService()
+
+@pytest.fixture
+def smtp(monkeypatch):
+    """Mock smtplib.SMTP class; the session it opens is smtp.server"""
+    smtp_cls = MagicMock()
+    smtp_cls.server = smtp_cls.return_value.__enter__.return_value
+    smtp_cls.sleeps = []
+    monkeypatch.setattr('procur.services.email_service.smtplib.SMTP', smtp_cls)
+    monkeypatch.setattr('procur.services.email_service.time.sleep', smtp_cls.sleeps.append)
+    return smtp_cls
+
+class TestSendEmailRetry:
+    """Test SMTP throttling replies are retried on a new connection"""
+
+    def test_421_retries_on_new_connection(self, email_svc, smtp):
+        """Test a 421 (smtplib closes the session) is retried with a fresh connection"""
+        smtp.server.send_message.side_effect = [
+            smtplib.SMTPSenderRefused(421, b"Too many connections", "noreply@example.com"),
+            None,
+        ]
+
+        result = email_svc._send_email_sync(_TO, _TEMPLATE)
+
+        assert result["success"] is True
+        assert smtp.call_count == 2
+        assert smtp.server.login.call_count == 2
+        assert smtp.sleeps == [0.1]
+        assert email_svc.get_stats()["sent"] == 1
+
+    def test_451_at_rcpt_is_retried(self, email_svc, smtp):
+        """Test a 451 for every recipient at RCPT counts as throttling"""
+        smtp.server.send_message.side_effect = [
+            smtplib.SMTPRecipientsRefused({_TO: (451, b"Try again later")}),
+            None,
+        ]
+
+        result = email_svc._send_email_sync(_TO, _TEMPLATE)
+
+        assert result["success"] is True
+        assert smtp.call_count == 2
+
+    def test_550_is_not_retried(self, email_svc, smtp):
+        """Test a permanent 550 refusal fails immediately"""
+        smtp.server.send_message.side_effect = smtplib.SMTPRecipientsRefused({_TO: (550, b"No such user")})
+
+        result = email_svc._send_email_sync(_TO, _TEMPLATE)
+
+        assert result["success"] is False
+        assert result["error"].startswith("Recipient refused")
+        assert smtp.call_count == 1
+        assert smtp.sleeps == []
+        assert email_svc.get_stats()["failed"] == 1
+
+    def test_gives_up_after_max_retries(self, email_svc, smtp):
+        """Test a server that keeps throttling is abandoned after SMTP_MAX_RETRIES"""
+        smtp.server.send_message.side_effect = smtplib.SMTPDataError(421, b"Busy")
+
+        result = email_svc._send_email_sync(_TO, _TEMPLATE)
+
+        assert result["success"] is False
+        assert smtp.call_count == SMTP_MAX_RETRIES + 1
+        assert len(smtp.sleeps) == SMTP_MAX_RETRIES
+
+@pytest.fixture
+def enabled_svc(email_svc):
+    """EmailService with notifications enabled regardless of the environment"""
+    email_svc.settings = email_svc.settings.model_copy(update={"ENABLE_EMAIL_NOTIFICATIONS": True})
+    return email_svc
+
+class TestSendBulkEmails:
+    """Test bulk sends stream per-recipient results"""
+
+    async def test_results_stream_in_completion_order(self, enabled_svc, monkeypatch):
+        """Test each result is yielded as soon as its send finishes"""
+        delays = {"slow@example.com": 0.03, "fast@example.com": 0, "medium@example.com": 0.01}
+
+        async def fake_send(to_email, template):
+            await asyncio.sleep(delays[to_email])
+            return {"email": to_email, "success": True}
+
+        monkeypatch.setattr(enabled_svc, "send_email", fake_send)
+
+        results = [r async for r in enabled_svc.send_bulk_emails(list(delays), _TEMPLATE)]
+
+        assert [r["email"] for r in results] == ["fast@example.com", "medium@example.com", "slow@example.com"]
+
+    async def test_error_is_reported_for_its_recipient(self, enabled_svc, monkeypatch):
+        """Test an exception from one send is attributed to that recipient"""
+        async def fake_send(to_email, template):
+            if to_email == "broken@example.com":
+                raise RuntimeError("executor shut down")
+            return {"email": to_email, "success": True}
+
+        monkeypatch.setattr(enabled_svc, "send_email", fake_send)
+
+        results = await enabled_svc.send_bulk_emails_list(["ok@example.com", "broken@example.com"], _TEMPLATE)
+
+        by_email = {r["email"]: r for r in results}
+        assert by_email["ok@example.com"]["success"] is True
+        assert by_email["broken@example.com"] == {
+            "email": "broken@example.com",
+            "success": False,
+            "error": "executor shut down",
+        }
+
+    async def test_duplicates_are_dropped_keeping_first_spelling(self, email_svc):
+        """Test recipients differing only in domain case are sent once, first spelling first"""
+        # With notifications disabled results are yielded in recipient order, without sending
+        email_svc.settings = email_svc.settings.model_copy(update={"ENABLE_EMAIL_NOTIFICATIONS": False})
+
+        results = await email_svc.send_bulk_emails_list([
+            "Alice@Example.com",
+            "bob@example.com",
+            "Alice@example.COM",
+            "alice@example.com",
+        ], _TEMPLATE)
+
+        # alice@ differs from Alice@ in the case-sensitive local part, so it is kept
+        assert [r["email"] for r in results] == ["Alice@Example.com", "bob@example.com", "alice@example.com"]
@@ -0,0 +1,47 @@
+import pytest
+from markupsafe import escape
+from procur.templates.email_templates import get_template_by_name
+
+# User-supplied text that must be escaped in HTML and kept verbatim in plain text
+_PAYLOAD = "<script>alert(1)</script> & Co"
+
+# Template name -> render data, with the payload in every user-supplied field
+_TEMPLATE_DATA = {
+    "welcome": {"user_name": _PAYLOAD},
+    "join_request": {
+        "group_name": _PAYLOAD, "requester_name": _PAYLOAD, "requester_email": "someone@example.com",
+        "message": _PAYLOAD, "request_id": "request_123",
+    },
+    "join_approved": {"group_name": _PAYLOAD, "user_name": _PAYLOAD},
+    "invitation": {
+        "group_name": _PAYLOAD, "inviter_name": _PAYLOAD,
+        "invitation_url": "https://procur.example.com/join/token", "group_description": _PAYLOAD,
+    },
+    "password_reset": {"user_name": _PAYLOAD, "reset_url": "https://procur.example.com/reset/token"},
+}
+
+class TestEmailTemplateEscaping:
+    """Test user-supplied fields are escaped in HTML bodies only"""
+
+    @pytest.mark.parametrize("template_name", list(_TEMPLATE_DATA))
+    def test_html_escaped_text_verbatim(self, template_name):
+        """Test the payload is HTML-escaped in html_body and left as-is in text_body"""
+        template = get_template_by_name(template_name, _TEMPLATE_DATA[template_name])
+
+        assert str(escape(_PAYLOAD)) in template.html_body
+        assert "<script>" not in template.html_body
+        assert _PAYLOAD in template.text_body
+
+    def test_base_layout_is_rendered(self):
+        """Test content is rendered inside the shared base layout with its CSS intact"""
+        template = get_template_by_name("welcome", {"user_name": "Ada"})
+
+        assert '<div class="email-container">' in template.html_body
+        assert "max-width: 600px;" in template.html_body
+        assert "{%" not in template.html_body
+        assert "Hi Ada!" in template.html_body
+
+    def test_unknown_template_raises(self):
+        """Test unknown template names are rejected"""
+        with pytest.raises(ValueError, match="Unknown template"):
+            get_template_by_name("missing", {})
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from unittest.mock import Mock
+from procur.models.schemas import JoinRequestCreate, JoinRequestStatus
+from procur.services import group_service
+from procur.services.group_service import GroupService
+
+@pytest.fixture
+def service(test_group_data):
+    """GroupService over a mock Firestore: the group exists, the user is not a member, nothing pending"""
+    db = Mock()
+    group_ref = db.collection.return_value.document.return_value
+    group_ref.path = 'groups/test_group_789'
+    member_ref = group_ref.collection.return_value.document.return_value
+    member_ref.path = 'groups/test_group_789/members/test_user_123'
+
+    group_snap = Mock(exists=True, reference=group_ref)
+    group_snap.to_dict.return_value = dict(test_group_data, industry='Hospitality', updated_at=test_group_data['created_at'])
+    db.get_all.return_value = [Mock(exists=False, reference=member_ref), group_snap]
+
+    pending = db.collection.return_value.where.return_value.where.return_value.where.return_value
+    pending.limit.return_value.get.return_value = []
+
+    svc = GroupService()
+    svc._db = db
+    return svc
+
+class TestRequestToJoin:
+    """Test join requests notify the admin in the background"""
+
+    async def test_admin_notification_is_fire_and_forget(self, service, monkeypatch):
+        """Test request_to_join returns before the admin email is sent and drops the task when done"""
+        release = asyncio.Event()
+        notified = []
+
+        async def slow_notify(self, group, join_request):
+            await release.wait()
+            notified.append(join_request['id'])
+
+        monkeypatch.setattr(GroupService, '_notify_admin_of_join_request', slow_notify)
+
+        response = await service.request_to_join(
+            JoinRequestCreate(group_id='test_group_789', message='Hello'),
+            'test_user_123', 'test@example.com', 'Test User'
+        )
+
+        # Returned while the notification is still blocked
+        assert response.status == JoinRequestStatus.PENDING
+        assert notified == []
+        (task,) = group_service._background_tasks
+
+        release.set()
+        await task
+        await asyncio.sleep(0)  # let the done callback run
+
+        assert notified == [response.id]
+        assert task not in group_service._background_tasks
@@ -0,0 +1,36 @@
+import pytest
+from pydantic import ValidationError
+from procur.models.schemas import RegisterRequest, UserBase, UserUpdate
+
+class TestPhoneNumber:
+    """Test the shared phone number validation"""
+
+    @pytest.mark.parametrize("phone", ["1234567890", "+11234567890", "+123456789012345"])
+    def test_valid_phone(self, phone):
+        """Test well-formed numbers are accepted unchanged"""
+        assert UserUpdate(phone=phone).phone == phone
+
+    @pytest.mark.parametrize("phone", [
+        pytest.param("12345", id="too-short"),
+        pytest.param("123-456-7890", id="separators"),
+        pytest.param("1234567890\n", id="trailing-newline"),
+    ])
+    def test_invalid_phone(self, phone):
+        """Test malformed numbers are rejected"""
+        with pytest.raises(ValidationError, match="Invalid phone number format"):
+            UserUpdate(phone=phone)
+
+    def test_register_request_phone_number(self):
+        """Test RegisterRequest.phone_number uses the same validation"""
+        with pytest.raises(ValidationError, match="Invalid phone number format"):
+            RegisterRequest(
+                email="test@example.com",
+                password="secret123",
+                display_name="Test User",
+                phone_number="1234567890\n",
+            )
+
+    def test_pattern_in_json_schema(self):
+        """Test the pattern is still published in the OpenAPI schema"""
+        phone_schema = UserBase.model_json_schema()["properties"]["phone"]
+        assert {"type": "string", "pattern": r"^\+?1?\d{9,15}$"} in phone_schema["anyOf"]
@@ -4,136 +4,127 @@ Test Runner Script for Procur Backend
 Provides easy commands to run different types of tests
 """
 
+import shlex
 import subprocess
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def run_command(command, description):
-    """Run a command and display the result"""
+def run_command(argv, description):
+    """Run a command (argv list, no shell) and display the result"""
     print(f"\n{'='*60}")
     print(f"🚀 {description}")
     print(f"{'='*60}")
-    print(f"Running: {command}")
+    print(f"Running: {shlex.join(argv)}")
     print(f"{'='*60}")
     
     try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=False)
+        subprocess.run(argv, check=True)
         print(f"\n✅ {description} completed successfully!")
         return True
     except subprocess.CalledProcessError as e:
         print(f"\n❌ {description} failed with exit code {e.returncode}")
         return False
+    except FileNotFoundError:
+        print(f"\n❌ {description} failed: {argv[0]} not found")
+        return False
+
+def run_commands_parallel(commands):
+    """Run independent commands concurrently and report each result in order"""
+    print(f"\n🚀 Running {len(commands)} checks in parallel...")
+    with ThreadPoolExecutor(max_workers=len(commands)) as pool:
+        futures = [
+            pool.submit(subprocess.run, argv, capture_output=True, text=True)
+            for argv, _ in commands
+        ]
+    
+    all_passed = True
+    for (argv, description), future in zip(commands, futures):
+        print(f"\n{'='*60}")
+        print(f"🚀 {description}")
+        print(f"{'='*60}")
+        print(f"Running: {shlex.join(argv)}")
+        print(f"{'='*60}")
+        try:
+            result = future.result()
+        except FileNotFoundError:
+            print(f"\n❌ {description} failed: {argv[0]} not found")
+            all_passed = False
+            continue
+        print(result.stdout, end="")
+        print(result.stderr, end="", file=sys.stderr)
+        if result.returncode == 0:
+            print(f"\n✅ {description} completed successfully!")
+        else:
+            print(f"\n❌ {description} failed with exit code {result.returncode}")
+            all_passed = False
+    return all_passed
+
+def pytest_command():
+    """Base pytest argv, sharded across all cores but two (serial if NO_PARALLEL is set)"""
+    workers = 0 if os.environ.get("NO_PARALLEL") else max(1, (os.cpu_count() or 1) - 2)
+    return [sys.executable, "-m", "pytest", "-n", str(workers), "--dist", "loadfile"]
+
+LINT_COMMANDS = [
+    (["black", "--check", "procur/"], "Code Formatting Check"),
+    (["isort", "--check-only", "procur/"], "Import Sorting Check"),
+    (["flake8", "procur/"], "Code Quality Check"),
+    (["mypy", "procur/"], "Type Checking")
+]
+
+# name -> (help text, description, pytest arguments); None runs the lint checks instead
+COMMANDS = {
+    "all": ("Run all tests", "All Tests", ["procur/tests/", "-v"]),
+    "unit": ("Run unit tests only", "Unit Tests", ["procur/tests/test_dependencies.py", "-v"]),
+    "security": ("Run security tests only", "Security Tests", ["procur/tests/test_dependencies.py::TestGetCurrentUser", "-v"]),
+    "dependencies": ("Run dependency tests only", "Dependency Tests", ["procur/tests/test_dependencies.py", "-v"]),
+    "endpoints": ("Run API endpoint tests only", "API Endpoint Tests", ["procur/tests/test_api_endpoints.py", "-v"]),
+    "coverage": ("Run tests with coverage report", "Tests with Coverage", ["procur/tests/", "--cov=procur", "--cov-report=html", "--cov-report=term"]),
+    "lint": ("Run code linting", "Linting Checks", None),
+}
+
+def print_usage():
+    """Print the command menu, generated from COMMANDS so it cannot drift"""
+    print("\nUsage:")
+    print("  python run_tests.py [command]")
+    print("\nCommands:")
+    for name, (help_text, _, _) in COMMANDS.items():
+        print(f"  {name:<12} - {help_text}")
+    print(f"  {'help':<12} - Show this help message")
 
 def main():
     """Main test runner function"""
     print("🧪 Procur Backend Test Runner")
     print("=" * 40)
     
-    if len(sys.argv) < 2:
-        print("\nUsage:")
-        print("  python run_tests.py [command]")
-        print("\nCommands:")
-        print("  all          - Run all tests")
-        print("  unit         - Run unit tests only")
-        print("  security     - Run security tests only")
-        print("  dependencies - Run dependency tests only")
-        print("  endpoints    - Run API endpoint tests only")
-        print("  coverage     - Run tests with coverage report")
-        print("  lint         - Run code linting")
-        print("  help         - Show this help message")
-        return
-    
-    command = sys.argv[1].lower()
-    
+    command = sys.argv[1].lower() if len(sys.argv) > 1 else "help"
     if command == "help":
-        print("\nAvailable Commands:")
-        print("  all          - Run all tests")
-        print("  unit         - Run unit tests only")
-        print("  security     - Run security tests only")
-        print("  dependencies - Run dependency tests only")
-        print("  endpoints    - Run API endpoint tests only")
-        print("  coverage     - Run tests with coverage report")
-        print("  lint         - Run code linting")
-        print("  help         - Show this help message")
+        print_usage()
         return
     
+    if command not in COMMANDS:
+        print(f"\n❌ Unknown command: {command}")
+        print("Use 'python run_tests.py help' to see available commands")
+        sys.exit(1)
+    
     # Ensure we're in the right directory
     os.chdir(Path(__file__).parent)
+    _, description, pytest_args = COMMANDS[command]
     
-    if command == "all":
-        success = run_command("python -m pytest procur/tests/ -v", "All Tests")
-        if success:
-            print("\n🎉 All tests passed!")
-        else:
-            print("\n💥 Some tests failed!")
-            sys.exit(1)
-    
-    elif command == "unit":
-        success = run_command("python -m pytest procur/tests/test_dependencies.py -v", "Unit Tests")
-        if success:
-            print("\n🎉 Unit tests passed!")
-        else:
-            print("\n💥 Unit tests failed!")
-            sys.exit(1)
-    
-    elif command == "security":
-        success = run_command("python -m pytest procur/tests/test_dependencies.py::TestGetCurrentUser -v", "Security Tests")
-        if success:
-            print("\n🎉 Security tests passed!")
-        else:
-            print("\n💥 Security tests failed!")
-            sys.exit(1)
-    
-    elif command == "dependencies":
-        success = run_command("python -m pytest procur/tests/test_dependencies.py -v", "Dependency Tests")
-        if success:
-            print("\n🎉 Dependency tests passed!")
-        else:
-            print("\n💥 Dependency tests failed!")
-            sys.exit(1)
-    
-    elif command == "endpoints":
-        success = run_command("python -m pytest procur/tests/test_api_endpoints.py -v", "API Endpoint Tests")
-        if success:
-            print("\n🎉 API endpoint tests passed!")
-        else:
-            print("\n💥 API endpoint tests failed!")
-            sys.exit(1)
-    
-    elif command == "coverage":
-        success = run_command("python -m pytest procur/tests/ --cov=procur --cov-report=html --cov-report=term", "Tests with Coverage")
-        if success:
-            print("\n🎉 Coverage tests passed!")
-            print("📊 Coverage report generated in htmlcov/ directory")
-        else:
-            print("\n💥 Coverage tests failed!")
-            sys.exit(1)
-    
-    elif command == "lint":
+    if pytest_args is None:
         print("\n🔍 Running Code Linting...")
-        lint_commands = [
-            ("black --check procur/", "Code Formatting Check"),
-            ("isort --check-only procur/", "Import Sorting Check"),
-            ("flake8 procur/", "Code Quality Check"),
-            ("mypy procur/", "Type Checking")
-        ]
-        
-        all_passed = True
-        for cmd, desc in lint_commands:
-            if not run_command(cmd, desc):
-                all_passed = False
-        
-        if all_passed:
-            print("\n🎉 All linting checks passed!")
-        else:
-            print("\n💥 Some linting checks failed!")
-            sys.exit(1)
-    
+        success = run_commands_parallel(LINT_COMMANDS)
     else:
-        print(f"\n❌ Unknown command: {command}")
-        print("Use 'python run_tests.py help' to see available commands")
+        success = run_command([*pytest_command(), *pytest_args], description)
+    
+    if not success:
+        print(f"\n💥 {description} failed!")
         sys.exit(1)
+    
+    print(f"\n🎉 {description} passed!")
+    if command == "coverage":
+        print("📊 Coverage report generated in htmlcov/ directory")
 
 if __name__ == "__main__":
     main()
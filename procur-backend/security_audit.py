@@ -7,14 +7,228 @@ This script checks for common security issues and verifies security fixes.
 import os
 import re
 import ast
+import json
+import mmap
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Optional, Set, Tuple
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Per-file scan results are cached here, keyed by path, mtime and size.
+# Bump SCHEMA_VERSION whenever a check changes so stale entries are ignored.
+AUDIT_CACHE_FILE = ".security_audit_cache.json"
+SCHEMA_VERSION = 4
+
+# Manual admin checks that should be replaced by the require_group_admin dependency
+_MANUAL_PERM_RE = re.compile(
+    b"|".join(b"(?:" + p + b")" for p in [
+        rb'member_doc\.to_dict\(\)\.get\(\'role\'\)\s*!=\s*[\'"]admin[\'"]',
+        rb'if not member_doc\.exists or.*role.*!=.*admin',
+        rb'verify.*admin.*privileges',
+        rb'check.*admin.*status',
+    ]),
+    re.IGNORECASE,
+)
+
+@contextmanager
+def _map_file(path: Path):
+    """Map a file read-only so it can be scanned as bytes without copying it"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap cannot map empty files
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            yield content
+
+
+def _contains(content, needle: str) -> bool:
+    """Substring test that works on mmap objects, whose `in` only matches single bytes"""
+    return content.find(needle.encode()) != -1
+
+
+_ROUTE_METHODS = {"get", "post", "put", "delete", "patch"}
+_AUTH_DEPENDENCIES = {"get_current_user", "require_group_admin", "require_group_member"}
+
+
+def _call_name(node) -> str:
+    """Return the bare name of a call target such as foo(...) or mod.foo(...)"""
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return ""
+
+
+class _RouteVisitor(ast.NodeVisitor):
+    """Collect everything the route checks need in a single pass over the AST"""
+    
+    def __init__(self, has_routes: bool = True):
+        # Files with no "@router." text cannot define endpoints, so decorator inspection is skipped
+        self.has_routes = has_routes
+        self.unauthenticated_routes = []
+        self.bare_excepts = 0
+        self.uses_http_exception = False
+        self.has_forbidden_status = False
+        self.has_upload = False
+        self.names = set()
+    
+    def visit_FunctionDef(self, node):
+        self._check_route(node)
+        self.generic_visit(node)
+    
+    visit_AsyncFunctionDef = visit_FunctionDef
+    
+    def _check_route(self, node):
+        if not self.has_routes or not node.decorator_list:
+            return
+        
+        route_decorators = [
+            d for d in node.decorator_list
+            if isinstance(d, ast.Call)
+            and isinstance(d.func, ast.Attribute)
+            and d.func.attr in _ROUTE_METHODS
+            and _call_name(d.func.value) == "router"
+        ]
+        if not route_decorators:
+            return
+        
+        # Auth can come from a parameter default or the decorator's dependencies=[...]
+        candidates = node.args.defaults + [d for d in node.args.kw_defaults if d is not None]
+        for decorator in route_decorators:
+            for keyword in decorator.keywords:
+                if keyword.arg == "dependencies" and isinstance(keyword.value, (ast.List, ast.Tuple)):
+                    candidates.extend(keyword.value.elts)
+        
+        for candidate in candidates:
+            if (
+                isinstance(candidate, ast.Call)
+                and _call_name(candidate) == "Depends"
+                and candidate.args
+                and _call_name(candidate.args[0]) in _AUTH_DEPENDENCIES
+            ):
+                return
+        
+        # Public endpoints (health checks, etc.) are allowed to skip authentication
+        docstring = (ast.get_docstring(node) or "").lower()
+        name = node.name.lower()
+        if any(marker in name or marker in docstring for marker in ("health", "public")):
+            return
+        
+        self.unauthenticated_routes.append(node.name)
+    
+    def visit_ExceptHandler(self, node):
+        if node.type is None:
+            self.bare_excepts += 1
+        self.generic_visit(node)
+    
+    def visit_Call(self, node):
+        if _call_name(node) == "HTTPException":
+            for keyword in node.keywords:
+                if keyword.arg != "status_code":
+                    continue
+                value = keyword.value
+                if (isinstance(value, ast.Constant) and value.value == 403) or _call_name(value) == "HTTP_403_FORBIDDEN":
+                    self.has_forbidden_status = True
+        self.generic_visit(node)
+    
+    def visit_arg(self, node):
+        self.names.add(node.arg)
+        if node.annotation is not None and any(
+            _call_name(n) == "UploadFile" for n in ast.walk(node.annotation)
+        ):
+            self.has_upload = True
+        self.generic_visit(node)
+    
+    def visit_Name(self, node):
+        self.names.add(node.id)
+        if node.id == "HTTPException":
+            self.uses_http_exception = True
+    
+    def visit_Attribute(self, node):
+        self.names.add(node.attr)
+        self.generic_visit(node)
+
+
+def _check_manual_permission_checks(content: bytes, filename: str, warnings: List[str]):
+    """Check for manual permission checks that should use dependencies"""
+    if _MANUAL_PERM_RE.search(content):
+        warnings.append(
+            f"{filename}: Manual admin permission check detected - consider using require_group_admin dependency"
+        )
+
+
+def _check_missing_authentication(visitor: _RouteVisitor, filename: str, warnings: List[str]):
+    """Check for endpoints missing authentication"""
+    for _ in visitor.unauthenticated_routes:
+        warnings.append(
+            f"{filename}: Endpoint without authentication dependency detected"
+        )
+
+
+def _check_error_handling(visitor: _RouteVisitor, filename: str, warnings: List[str]):
+    """Check for proper error handling"""
+    # Look for bare except clauses
+    if visitor.bare_excepts:
+        warnings.append(
+            f"{filename}: Bare except clause detected - should specify exception types"
+        )
+    
+    # Look for proper HTTP exception usage
+    if visitor.uses_http_exception and not visitor.has_forbidden_status:
+        warnings.append(
+            f"{filename}: Missing 403 Forbidden status codes for permission errors"
+        )
+
+
+def _check_input_validation(visitor: _RouteVisitor, filename: str, warnings: List[str]):
+    """Check for input validation"""
+    # Look for file upload endpoints
+    if visitor.has_upload:
+        if 'validate_file' not in visitor.names and 'file_size' not in visitor.names:
+            warnings.append(
+                f"{filename}: File upload endpoint without size validation"
+            )
+
+
+def _scan_route(path: str) -> Tuple[List[str], List[str], List[str]]:
+    """Audit one route file and return (issues, warnings, passes).
+    
+    Touches no shared state so it can run in a worker process.
+    """
+    route_file = Path(path)
+    issues, warnings, passes = [], [], []
+    try:
+        with _map_file(route_file) as content:
+            filename = route_file.name
+            visitor = _RouteVisitor(has_routes=_contains(content, '@router.'))
+            visitor.visit(ast.parse(content, filename=path))
+            
+            # Check for manual permission checks instead of dependencies
+            _check_manual_permission_checks(content, filename, warnings)
+            
+            # Check for missing authentication
+            _check_missing_authentication(visitor, filename, warnings)
+            
+            # Check for proper error handling
+            _check_error_handling(visitor, filename, warnings)
+            
+            # Check for input validation
+            _check_input_validation(visitor, filename, warnings)
+            
+    except Exception as e:
+        issues.append(f"Error auditing {route_file.name}: {e}")
+    return issues, warnings, passes
+
+
 class SecurityAuditor:
     def __init__(self, project_root: str):
         self.project_root = Path(project_root)
@@ -23,8 +237,64 @@ class SecurityAuditor:
         self.security_issues = []
         self.security_warnings = []
         self.security_passes = []
+        self._cache_path = self.project_root / AUDIT_CACHE_FILE
+        self._cache = self._load_cache()
+        self._cache_used = set()
         
-    def run_audit(self) -> Dict[str, List[str]]:
+    def _load_cache(self) -> Dict[str, Dict[str, List[str]]]:
+        """Load cached per-file scan results, ignoring a missing or corrupt cache"""
+        try:
+            with open(self._cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+    
+    def _save_cache(self):
+        """Persist results for the files scanned in this run, dropping stale entries"""
+        cache = {key: self._cache[key] for key in self._cache_used if key in self._cache}
+        try:
+            with open(self._cache_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=1, sort_keys=True)
+        except OSError as e:
+            logger.warning(f"Could not write audit cache: {e}")
+    
+    def _cache_key(self, path: Path) -> Optional[str]:
+        """Key identifying this exact version of a file, or None if it cannot be stat'ed"""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        key = f"{SCHEMA_VERSION}:{path}:{stat.st_mtime_ns}:{stat.st_size}"
+        self._cache_used.add(key)
+        return key
+    
+    def _record(self, key: Optional[str], issues: List[str], warnings: List[str], passes: List[str]):
+        """Add one file's results to the report and remember them for the next run"""
+        self.security_issues.extend(issues)
+        self.security_warnings.extend(warnings)
+        self.security_passes.extend(passes)
+        if key is not None:
+            self._cache[key] = {"issues": issues, "warnings": warnings, "passes": passes}
+    
+    def _cached_scan(self, path: Path, scan) -> None:
+        """Run scan(path) unless results for this exact file version are cached"""
+        key = self._cache_key(path)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._record(key, cached["issues"], cached["warnings"], cached["passes"])
+            return
+        
+        start = (len(self.security_issues), len(self.security_warnings), len(self.security_passes))
+        scan(path)
+        if key is not None:
+            self._cache[key] = {
+                "issues": self.security_issues[start[0]:],
+                "warnings": self.security_warnings[start[1]:],
+                "passes": self.security_passes[start[2]:],
+            }
+    
+    def run_audit(self, log_report: bool = True) -> Dict[str, List[str]]:
         """Run comprehensive security audit"""
         logger.info("🔒 Starting Security Audit...")
         
@@ -41,7 +311,7 @@ class SecurityAuditor:
         self._audit_configuration()
         
         # Generate report
-        return self._generate_report()
+        return self._generate_report(log_report)
     
     def _audit_api_routes(self):
         """Audit API routes for security issues"""
@@ -51,96 +321,27 @@ class SecurityAuditor:
             self.security_issues.append("API routes directory not found")
             return
         
-        for route_file in self.api_routes_dir.glob("*.py"):
-            if route_file.name == "__init__.py":
-                continue
-                
-            self._audit_route_file(route_file)
-    
-    def _audit_route_file(self, route_file: Path):
-        """Audit individual route file"""
-        try:
-            with open(route_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            filename = route_file.name
-            
-            # Check for manual permission checks instead of dependencies
-            self._check_manual_permission_checks(content, filename)
-            
-            # Check for missing authentication
-            self._check_missing_authentication(content, filename)
-            
-            # Check for proper error handling
-            self._check_error_handling(content, filename)
-            
-            # Check for input validation
-            self._check_input_validation(content, filename)
-            
-        except Exception as e:
-            self.security_issues.append(f"Error auditing {route_file.name}: {e}")
-    
-    def _check_manual_permission_checks(self, content: str, filename: str):
-        """Check for manual permission checks that should use dependencies"""
-        patterns = [
-            r'member_doc\.to_dict\(\)\.get\(\'role\'\)\s*!=\s*[\'"]admin[\'"]',
-            r'if not member_doc\.exists or.*role.*!=.*admin',
-            r'verify.*admin.*privileges',
-            r'check.*admin.*status'
-        ]
-        
-        for pattern in patterns:
-            if re.search(pattern, content, re.IGNORECASE):
-                self.security_warnings.append(
-                    f"{filename}: Manual admin permission check detected - consider using require_group_admin dependency"
-                )
-    
-    def _check_missing_authentication(self, content: str, filename: str):
-        """Check for endpoints missing authentication"""
-        # Look for router decorators without authentication
-        router_patterns = [
-            r'@router\.(get|post|put|delete|patch)\([^)]*\)\s*\n\s*async def [^(]*\([^)]*\):',
+        route_files = [
+            route_file for route_file in sorted(self.api_routes_dir.glob("*.py"))
+            if route_file.name != "__init__.py"
         ]
+        keys = [self._cache_key(route_file) for route_file in route_files]
+        pending = [str(f) for f, key in zip(route_files, keys) if key not in self._cache]
         
-        for pattern in router_patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                # Check if the function has authentication dependency
-                func_start = match.end()
-                func_end = content.find('\n\n', func_start)
-                if func_end == -1:
-                    func_end = len(content)
-                
-                func_content = content[func_start:func_end]
-                if 'Depends(get_current_user)' not in func_content and 'Depends(require_group_admin' not in func_content and 'Depends(require_group_member' not in func_content:
-                    # Check if it's a public endpoint (health check, etc.)
-                    if 'health' not in func_content.lower() and 'public' not in func_content.lower():
-                        self.security_warnings.append(
-                            f"{filename}: Endpoint without authentication dependency detected"
-                        )
-    
-    def _check_error_handling(self, content: str, filename: str):
-        """Check for proper error handling"""
-        # Look for bare except clauses
-        if 'except:' in content:
-            self.security_warnings.append(
-                f"{filename}: Bare except clause detected - should specify exception types"
-            )
+        # Scan changed files in parallel; a pool is not worth starting for one file
+        if len(pending) > 1:
+            workers = max(1, min(len(pending), (os.cpu_count() or 2) - 1))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = dict(zip(pending, executor.map(_scan_route, pending, chunksize=4)))
+        else:
+            results = {path: _scan_route(path) for path in pending}
         
-        # Look for proper HTTP exception usage
-        if 'HTTPException' in content and 'status_code=403' not in content:
-            self.security_warnings.append(
-                f"{filename}: Missing 403 Forbidden status codes for permission errors"
-            )
-    
-    def _check_input_validation(self, content: str, filename: str):
-        """Check for input validation"""
-        # Look for file upload endpoints
-        if 'UploadFile' in content:
-            if 'validate_file' not in content and 'file_size' not in content:
-                self.security_warnings.append(
-                    f"{filename}: File upload endpoint without size validation"
-                )
+        for route_file, key in zip(route_files, keys):
+            if key in self._cache:
+                cached = self._cache[key]
+                self._record(key, cached["issues"], cached["warnings"], cached["passes"])
+            else:
+                self._record(key, *results[str(route_file)])
     
     def _audit_core_security(self):
         """Audit core security modules"""
@@ -149,42 +350,40 @@ class SecurityAuditor:
         # Check dependencies.py
         dependencies_file = self.core_dir / "dependencies.py"
         if dependencies_file.exists():
-            self._audit_dependencies_file(dependencies_file)
+            self._cached_scan(dependencies_file, self._audit_dependencies_file)
         else:
             self.security_issues.append("dependencies.py not found")
         
         # Check firebase.py
         firebase_file = self.core_dir / "firebase.py"
         if firebase_file.exists():
-            self._audit_firebase_file(firebase_file)
+            self._cached_scan(firebase_file, self._audit_firebase_file)
         else:
             self.security_issues.append("firebase.py not found")
     
     def _audit_dependencies_file(self, dependencies_file: Path):
         """Audit dependencies.py for security features"""
         try:
-            with open(dependencies_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+            with _map_file(dependencies_file) as content:
+                # Check for required security functions
+                required_functions = [
+                    'require_group_admin',
+                    'require_group_member',
+                    'enforce_group_privacy',
+                    'get_current_user'
+                ]
             
-            # Check for required security functions
-            required_functions = [
-                'require_group_admin',
-                'require_group_member',
-                'enforce_group_privacy',
-                'get_current_user'
-            ]
+                for func in required_functions:
+                    if not _contains(content, func):
+                        self.security_issues.append(f"Missing required security function: {func}")
+                    else:
+                        self.security_passes.append(f"Security function found: {func}")
             
-            for func in required_functions:
-                if func not in content:
-                    self.security_issues.append(f"Missing required security function: {func}")
+                # Check for proper error handling
+                if _contains(content, 'HTTPException') and _contains(content, 'status_code=403'):
+                    self.security_passes.append("Proper permission error handling")
                 else:
-                    self.security_passes.append(f"Security function found: {func}")
-            
-            # Check for proper error handling
-            if 'HTTPException' in content and 'status_code=403' in content:
-                self.security_passes.append("Proper permission error handling")
-            else:
-                self.security_warnings.append("Missing proper permission error handling")
+                    self.security_warnings.append("Missing proper permission error handling")
                 
         except Exception as e:
             self.security_issues.append(f"Error auditing dependencies.py: {e}")
@@ -192,22 +391,20 @@ class SecurityAuditor:
     def _audit_firebase_file(self, firebase_file: Path):
         """Audit firebase.py for security features"""
         try:
-            with open(firebase_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Check for security features
-            security_features = [
-                'verify_firebase_token',
-                'blacklist_token',
-                'revoke_user_tokens',
-                'rate_limit'
-            ]
+            with _map_file(firebase_file) as content:
+                # Check for security features
+                security_features = [
+                    'verify_firebase_token',
+                    'blacklist_token',
+                    'revoke_user_tokens',
+                    'rate_limit'
+                ]
             
-            for feature in security_features:
-                if feature in content:
-                    self.security_passes.append(f"Security feature found: {feature}")
-                else:
-                    self.security_warnings.append(f"Missing security feature: {feature}")
+                for feature in security_features:
+                    if _contains(content, feature):
+                        self.security_passes.append(f"Security feature found: {feature}")
+                    else:
+                        self.security_warnings.append(f"Missing security feature: {feature}")
                     
         except Exception as e:
             self.security_issues.append(f"Error auditing firebase.py: {e}")
@@ -218,28 +415,26 @@ class SecurityAuditor:
         
         requirements_file = self.project_root / "requirements.txt"
         if requirements_file.exists():
-            self._audit_requirements_file(requirements_file)
+            self._cached_scan(requirements_file, self._audit_requirements_file)
         else:
             self.security_warnings.append("requirements.txt not found")
     
     def _audit_requirements_file(self, requirements_file: Path):
         """Audit requirements.txt for known vulnerable packages"""
         try:
-            with open(requirements_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Check for known secure packages
-            secure_packages = [
-                'fastapi',
-                'firebase-admin',
-                'pydantic'
-            ]
+            with _map_file(requirements_file) as content:
+                # Check for known secure packages
+                secure_packages = [
+                    'fastapi',
+                    'firebase-admin',
+                    'pydantic'
+                ]
             
-            for package in secure_packages:
-                if package in content:
-                    self.security_passes.append(f"Secure package found: {package}")
-                else:
-                    self.security_warnings.append(f"Package not found: {package}")
+                for package in secure_packages:
+                    if _contains(content, package):
+                        self.security_passes.append(f"Secure package found: {package}")
+                    else:
+                        self.security_warnings.append(f"Package not found: {package}")
                     
         except Exception as e:
             self.security_issues.append(f"Error auditing requirements.txt: {e}")
@@ -260,47 +455,59 @@ class SecurityAuditor:
         else:
             self.security_warnings.append("Security configuration file not found")
     
-    def _generate_report(self) -> Dict[str, List[str]]:
+    def _generate_report(self, log_report: bool = True) -> Dict[str, List[str]]:
         """Generate security audit report"""
         logger.info("📊 Generating security report...")
         
+        self._save_cache()
+        
         report = {
             "issues": self.security_issues,
             "warnings": self.security_warnings,
             "passes": self.security_passes
         }
         
-        # Print summary
-        logger.info(f"\n🔒 Security Audit Complete!")
-        logger.info(f"✅ Passes: {len(self.security_passes)}")
-        logger.info(f"⚠️  Warnings: {len(self.security_warnings)}")
-        logger.info(f"❌ Issues: {len(self.security_issues)}")
+        if log_report:
+            self._log_report()
+        
+        return report
+    
+    def _log_report(self):
+        """Log the report summary, emitting each section as one record"""
+        logger.info(
+            f"\n🔒 Security Audit Complete!\n"
+            f"✅ Passes: {len(self.security_passes)}\n"
+            f"⚠️  Warnings: {len(self.security_warnings)}\n"
+            f"❌ Issues: {len(self.security_issues)}"
+        )
         
         if self.security_issues:
-            logger.error("\n❌ Security Issues Found:")
-            for issue in self.security_issues:
-                logger.error(f"  - {issue}")
+            logger.error("\n❌ Security Issues Found:\n" + "\n".join(f"  - {i}" for i in self.security_issues))
         
         if self.security_warnings:
-            logger.warning("\n⚠️  Security Warnings:")
-            for warning in self.security_warnings:
-                logger.warning(f"  - {warning}")
+            logger.warning("\n⚠️  Security Warnings:\n" + "\n".join(f"  - {w}" for w in self.security_warnings))
         
         if self.security_passes:
-            logger.info("\n✅ Security Passes:")
-            for passed in self.security_passes:
-                logger.info(f"  - {passed}")
-        
-        return report
+            logger.info("\n✅ Security Passes:\n" + "\n".join(f"  - {p}" for p in self.security_passes))
 
 def main():
     """Main function to run security audit"""
+    # --json prints the report as JSON on stdout for CI instead of logging it
+    as_json = "--json" in sys.argv[1:]
+    if as_json:
+        logger.setLevel(logging.WARNING)
+    
     # Get project root (assuming script is in project root)
     project_root = Path(__file__).parent
     
     # Run audit
     auditor = SecurityAuditor(str(project_root))
-    report = auditor.run_audit()
+    report = auditor.run_audit(log_report=not as_json)
+    
+    if as_json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        exit(1 if report["issues"] else 0)
     
     # Exit with error code if issues found
     if report["issues"]:
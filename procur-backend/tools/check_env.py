@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Environment check script
+Prints the settings the app resolves from the environment and .env
+"""
+
+import sys
+from pathlib import Path
+
+
+def main():
+    # Make the procur package importable when run as `python tools/check_env.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from procur.core.config import get_settings
+
+    settings = get_settings()
+    print("🧪 Environment configuration:")
+    print(f"   ALLOWED_HOSTS: {settings.ALLOWED_HOSTS}")
+    print(f"   ENVIRONMENT: {settings.ENVIRONMENT}")
+    print(f"   DEBUG: {settings.DEBUG}")
+
+
+if __name__ == "__main__":
+    main()